@@ -0,0 +1,213 @@
+from functools import lru_cache
+
+# Advice is rendered for capital rounded to this many dollars, so nearby
+# balances share one cached rendering.
+CAPITAL_BUCKET = 1000
+
+# Location-specific market insights
+MARKET_INSIGHTS = {
+    "San Francisco Bay Area": """
+🏢 San Francisco Bay Area Strategy:
+• Tech Sector Dominance: With 50,000,000 people, focus on AI, cloud computing, and biotech
+• Venture Capital Availability: Access to $50B+ in VC funding annually
+• Talent Density: Silicon Valley hosts 500,000+ tech workers
+• Action Plan: Consider establishing a $500,000 seed fund for AI startups. Project: 12-month ROI at 45% with exits at $2.5M-$5M per company.
+    """.strip(),
+    "New York City": """
+🏙️ New York City Strategy:
+• Financial Center Advantage: Wall Street's global dominance ($60T AUM)
+• Media & Advertising: Top market for marketing spend ($100B+ annually)
+• Law & Corporate HQs: Fortune 500 headquarters concentration
+• Action Plan: Launch a $250,000 fintech accelerator. Project: 18-month timeline with $8M-$15M valuation upon Series A.
+    """.strip(),
+    "London": """
+🇬🇧 London Strategy:
+• Global Financial Hub: Time zone advantage for Asia-Pacific markets
+• Fintech Innovation: $4B+ annual investment in UK fintech sector
+• Legal Infrastructure: World-class corporate law and IP protection
+• Action Plan: Develop a cryptocurrency compliance platform ($500,000 setup). Project: 24-month compliance-first approach, 22% YOY revenue growth targeting $2.8M ARR.
+    """.strip(),
+    "Shanghai": """
+🏭 Shanghai Strategy:
+• Manufacturing Powerhouse: 26,000,000 population, global supply chain hub
+• Industrial Base: 90,000+ industrial enterprises
+• Cost Efficiency: 40-60% lower operational costs than US
+• Action Plan: Scale manufacturing operations. Budget: $800,000 for automated assembly line. Project: 36% cost reduction, 2.5x production capacity, 2-year ROI.
+    """.strip(),
+    "Texas Hill Country": """
+⚡ Texas Hill Country Strategy:
+• Energy Frontier: Oil & gas production, emerging renewable energy
+• Regulatory Environment: 0% corporate income tax, 0% franchise tax
+• Infrastructure: Gigawatt-scale renewable energy capacity
+• Action Plan: Invest $1,000,000 in solar farm development. Project: 7-year ROI with 15% annual returns, 15MW operational by Year 3.
+    """.strip()
+}
+
+ALLOCATION_OPTIONS = {
+    "low risk": ("Tech Equity Fund", 0.05, 0.08, "$500,000 minimum"),
+    "medium risk": ("Clean Energy Fund", 0.10, 0.18, "$250,000 minimum"),
+    "high risk": ("Crypto Venture Fund", 0.15, 0.35, "$100,000 minimum"),
+    "real estate": ("Commercial REIT", 0.12, 0.22, "$750,000 minimum")
+}
+
+LOCATION_TEMPLATE = """
+📍 LOCATION INSIGHTS: {location}
+{insights}
+
+📊 CURRENT STATE:
+• Capital: ${money:,.0f}
+• Personnel: {population:,.0f} employees
+• Operations: Expanding into {location}
+
+💡 RECOMMENDATION:
+Focus on sector specialization aligned with {location}'s competitive advantages. Consider increasing capital allocation by 30% for higher ROI in current location.
+"""
+
+INVESTMENT_OPTION = """Option {number}: {name}
+• Yield: {low:.1f}-{high:.1f}% annually
+• Minimum: {minimum}
+• Risk Profile: {profile}"""
+
+INVESTMENT_TEMPLATE = """
+💰 INVESTMENT ADVISORY
+Based on your portfolio size (${{money:,.0f}}), consider the following allocations:
+
+{options}
+
+🎯 RECOMMENDATION: Diversify across 3-4 options to balance risk and return.
+"""
+
+GROWTH_TEMPLATE = """
+📈 GROWTH STRATEGY ANALYSIS
+Current Metrics:
+• Employee Count: {population:,.0f}
+• Capital Allocation: ${money:,.0f}
+• Location: {location}
+
+Strategic Recommendations:
+
+1. Local Expansion (High Confidence)
+• Action: Increase operations by 25% in {location}
+• Investment Required: ${money_25:,.0f}
+• Expected Revenue: +${money_35:,.0f} annually
+• Timeline: 6-12 months
+
+2. Market Diversification (Medium Confidence)
+• Action: Enter adjacent market in another major hub
+• Target: Competing location with specialization overlap
+• Investment Required: ${money_40:,.0f}
+• Expected Revenue: +${money_50:,.0f} annually
+• Timeline: 12-18 months
+
+3. Strategic Partnership (Low-Medium Risk)
+• Action: Joint venture with local market leader
+• Investment Required: ${money_15:,.0f}
+• Expected ROI: 22-35% over 2-3 years
+
+💡 Suggested Path: Local expansion first (40% of capital), then market diversification.
+"""
+
+MARKET_TIMING_TEMPLATE = """
+📊 MARKET TIMING ANALYSIS
+Current Markets:
+• NASDAQ: 15,000 (Volatility: 1.2) - Tech sector recovering
+• S&P 500: 4,700 (Volatility: 0.8) - Stable large-cap
+• DOW JONES: 38,000 (Volatility: 0.7) - Blue-chip strength
+• BTC-USD: 45,000 (Volatility: 2.5) - High-risk crypto
+
+Timing Assessment:
+• Bull Markets: S&P 500 + DOW JONES showing strength
+• Risk Appetite: Varies by sector (Crypto: High, Tech: Medium)
+• Diversification: Critical given volatility spread
+
+Strategic Positioning:
+• Allocate 60% to index funds (S&P 500, DOW JONES)
+• Allocate 25% to tech exposure (NASDAQ)
+• Allocate 15% to opportunistic (Crypto/Real Estate)
+
+Expected Annual Return: 12-18% with 20% max drawdown
+"""
+
+GENERAL_TEMPLATE = """
+📋 STRATEGIC BUSINESS ADVISOR
+Current Context:
+• Location: {location}
+• Capital: ${money:,.0f}
+• Personnel: {population:,.0f} employees
+
+Key Insights:
+1. Location Advantage: {location} offers unique sector specialization
+2. Market Position: Strong foundation with ${money:,.0f} in liquidity
+3. Growth Potential: 25-40% annual expansion feasible
+
+Recommended Actions:
+• Increase local market share by 20% (6-12 month timeline)
+• Allocate $750,000 for strategic expansion initiatives
+• Diversify portfolio across 3-4 markets to reduce risk
+• Plan for Series A funding at $5M-$8M valuation (18-month horizon)
+
+Expected Outcomes:
+• Revenue: +${money_35:,.0f} annually
+• Profit Margin: 18-24% after expansion costs
+• Valuation Growth: 30-45% over 24 months
+
+Do you want me to elaborate on any specific recommendation?
+"""
+
+
+def compile_templates():
+    """Build the advice template registry: static text is baked in, numbers stay as fields."""
+    templates = {}
+    for location, insights in MARKET_INSIGHTS.items():
+        # Location names and insights contain no braces, so baking them in
+        # leaves only the numeric fields to fill per call.
+        templates[("location", location)] = LOCATION_TEMPLATE.replace("{location}", location).replace("{insights}", insights).strip()
+    options = "\n\n".join(
+        INVESTMENT_OPTION.format(number=number, name=name, low=low * 100, high=high * 100, minimum=minimum, profile=profile)
+        for number, (profile, (name, low, high, minimum)) in enumerate(
+            zip(("Low", "Medium", "High"), (ALLOCATION_OPTIONS[k] for k in ("low risk", "medium risk", "high risk"))), 1)
+    )
+    templates["invest"] = INVESTMENT_TEMPLATE.format(options=options).strip()
+    templates["growth"] = GROWTH_TEMPLATE.strip()
+    templates["market"] = MARKET_TIMING_TEMPLATE.strip()
+    templates["general"] = GENERAL_TEMPLATE.strip()
+    return templates
+
+
+TEMPLATES = compile_templates()
+
+
+def advice_kind(user_prompt, location):
+    if location in MARKET_INSIGHTS:
+        return ("location", location)
+    prompt_lower = user_prompt.lower()
+    if "invest" in prompt_lower:
+        return "invest"
+    if "expand" in prompt_lower or "growth" in prompt_lower:
+        return "growth"
+    if "market" in prompt_lower or "timing" in prompt_lower:
+        return "market"
+    return "general"
+
+
+@lru_cache(maxsize=4096)
+def render_advice(kind, location, money, population):
+    return TEMPLATES[kind].format(
+        location=location,
+        money=money,
+        population=population,
+        money_15=money * 0.15,
+        money_25=money * 0.25,
+        money_35=money * 0.35,
+        money_40=money * 0.40,
+        money_50=money * 0.50,
+    )
+
+
+def generate_business_advice(user_prompt, current_state):
+    """Generate realistic, data-driven business advice."""
+    location = current_state.get("location", "New York City")
+    money = current_state.get("money", 1000000)
+    population = current_state.get("population", 5000)
+    capital = round(money / CAPITAL_BUCKET) * CAPITAL_BUCKET
+    return render_advice(advice_kind(user_prompt, location), location, capital, population)
@@ -0,0 +1,327 @@
+"""Business advice from a model server, with the template advisor as fallback.
+
+    ADVISOR_URL=http://127.0.0.1:8001/v1/advice python serve.py
+    python advisor.py --port 8001 --latency 0.2      # local stand-in model server
+
+Without ADVISOR_URL the app answers unmatched chat prompts with the
+template advisor in advice.py, as before. With it, those prompts go to an
+Advisor, which:
+
+- answers repeated questions from an LRU cache with a TTL, keyed on the
+  normalized prompt and a compact digest of the state (money rounded, no
+  day or event log), so small state changes still hit;
+- joins concurrent requests for the same key into one backend call;
+- collects the remaining requests for up to BATCH_WINDOW seconds (or
+  BATCH_SIZE requests) and sends them as one batch;
+- sends batches over a pool of persistent HTTP/1.1 connections from its
+  own event loop thread, so no request worker does network I/O;
+- falls back to the template advice when the backend fails or takes
+  longer than ADVISOR_TIMEOUT; fallbacks are not cached.
+
+A backend is any object with `async complete(batch)`, taking a list of
+OpenAI-style message lists and returning one reply text per item.
+HttpBackend speaks the batch protocol of the stand-in server below:
+POST {"model": ..., "batch": [{"messages": [...]}, ...]} answered with
+{"choices": [{"message": {"content": ...}}, ...]} in batch order.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import re
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from advice import CAPITAL_BUCKET, generate_business_advice
+from metrics import Counter, Histogram
+
+ADVISOR_URL = os.environ.get("ADVISOR_URL")
+ADVISOR_MODEL = os.environ.get("ADVISOR_MODEL", "business-advisor")
+ADVISOR_TIMEOUT = float(os.environ.get("ADVISOR_TIMEOUT", "2.0"))
+ADVISOR_POOL_SIZE = int(os.environ.get("ADVISOR_POOL_SIZE", "8"))
+BATCH_SIZE = int(os.environ.get("ADVISOR_BATCH_SIZE", "16"))
+BATCH_WINDOW = float(os.environ.get("ADVISOR_BATCH_WINDOW", "0.005"))
+CACHE_SIZE = int(os.environ.get("ADVISOR_CACHE_SIZE", "4096"))
+CACHE_TTL = float(os.environ.get("ADVISOR_CACHE_TTL", "300"))
+
+# Fields the model sees, in digest order.
+DIGEST_FIELDS = ("location", "money", "population", "happiness", "energy", "security", "cash_invested")
+BUCKETED_FIELDS = ("money", "cash_invested")
+
+SYSTEM_PROMPT = "You are an expert business advisor providing realistic strategic guidance."
+
+ADVISOR_REQUESTS = Counter("advisor_requests_total", "Advice requests, by how they were answered.", ("outcome",))
+ADVISOR_SECONDS = Histogram("advisor_seconds", "Time to answer an advice request, fallbacks included.")
+ADVISOR_BATCH = Histogram("advisor_batch_size", "Requests per backend batch.", (1, 2, 4, 8, 16, 32, 64))
+
+
+def state_digest(state):
+    """Compact `key=value;...` summary of the fields that shape advice."""
+    parts = []
+    for name in DIGEST_FIELDS:
+        value = state.get(name)
+        if name in BUCKETED_FIELDS:
+            value = round(value / CAPITAL_BUCKET) * CAPITAL_BUCKET
+        parts.append(f"{name}={value}")
+    return ";".join(parts)
+
+
+def parse_digest(digest):
+    """The fields of a state_digest() string, numbers as ints."""
+    fields = dict(part.split("=", 1) for part in digest.split(";"))
+    return {name: (value if name == "location" else int(value)) for name, value in fields.items()}
+
+
+def normalize_prompt(prompt):
+    return re.sub(r"\s+", " ", prompt.lower()).strip(" ?!.")
+
+
+def build_messages(prompt, digest):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{prompt}\nState: {digest}\nProvide actionable business advice with specific numbers and timeline."},
+    ]
+
+
+class TTLCache:
+    """LRU cache whose entries also expire `ttl` seconds after they were set."""
+
+    def __init__(self, capacity=CACHE_SIZE, ttl=CACHE_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class HttpBackend:
+    """Posts batches to a model server over a pool of keep-alive connections.
+
+    Must be used from a single event loop; Advisor runs it on its own.
+    """
+
+    def __init__(self, url, model=ADVISOR_MODEL, pool_size=ADVISOR_POOL_SIZE):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.model = model
+        self.pool_size = pool_size
+        self._idle = []
+        self._slots = None
+
+    async def complete(self, batch):
+        body = json.dumps({"model": self.model, "batch": [{"messages": messages} for messages in batch]}).encode()
+        reply = json.loads(await self.post(body))
+        return [choice["message"]["content"] for choice in reply["choices"]]
+
+    async def post(self, body):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                reader, writer = self._idle.pop() if reused else await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+                try:
+                    status, keep_alive, data = await self._exchange(reader, writer, body)
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    # A pooled connection the server has closed since; try the next one.
+                    if not reused:
+                        raise
+                except BaseException:
+                    writer.close()
+                    raise
+            if keep_alive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+        if status != 200:
+            raise OSError(f"advisor backend answered {status}")
+        return data
+
+    async def _exchange(self, reader, writer, body):
+        writer.write(
+            f"POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("advisor backend closed the connection")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = await reader.readexactly(int(headers.get("content-length", "0")))
+        return status, headers.get("connection", "").lower() != "close", data
+
+
+class Advisor:
+    """Caches, batches and times out advice requests to a backend.
+
+    All of its state lives on one event loop running in a daemon thread,
+    started on first use (so forked server workers each get their own).
+    advise() blocks the calling thread until the reply, at most about
+    `timeout` seconds; advise_async() awaits it from another event loop.
+    """
+
+    def __init__(self, backend, timeout=ADVISOR_TIMEOUT, batch_size=BATCH_SIZE, batch_window=BATCH_WINDOW,
+                 cache=None):
+        self.backend = backend
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.cache = cache if cache is not None else TTLCache()
+        self._pending = []
+        self._flush_handle = None
+        self._inflight = {}
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def advise(self, prompt, digest):
+        return asyncio.run_coroutine_threadsafe(self._advise(prompt, digest), self._event_loop()).result()
+
+    async def advise_async(self, prompt, digest):
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._advise(prompt, digest), self._event_loop()))
+
+    def _event_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="advisor", daemon=True).start()
+            return self._loop
+
+    async def _advise(self, prompt, digest):
+        start = time.perf_counter()
+        key = (normalize_prompt(prompt), digest)
+        reply = self.cache.get(key)
+        if reply is not None:
+            ADVISOR_REQUESTS.inc("cache")
+        else:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = self._submit(build_messages(prompt, digest))
+                future.add_done_callback(lambda done: self._settle(key, done))
+            try:
+                reply = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+                ADVISOR_REQUESTS.inc("backend")
+            except Exception:
+                ADVISOR_REQUESTS.inc("fallback")
+                reply = generate_business_advice(prompt, parse_digest(digest))
+        ADVISOR_SECONDS.observe(time.perf_counter() - start)
+        return reply
+
+    def _settle(self, key, future):
+        del self._inflight[key]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.set(key, future.result())
+
+    def _submit(self, messages):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((messages, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        asyncio.get_running_loop().create_task(self._send(batch))
+
+    async def _send(self, batch):
+        ADVISOR_BATCH.observe(len(batch))
+        try:
+            # Bounded too, so a stalled call cannot hold a pooled connection for good.
+            replies = await asyncio.wait_for(self.backend.complete([messages for messages, _ in batch]), self.timeout)
+            if len(replies) != len(batch):
+                raise ValueError(f"advisor backend returned {len(replies)} replies for {len(batch)} requests")
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), reply in zip(batch, replies):
+            future.set_result(reply)
+
+
+def from_env():
+    """The Advisor configured by ADVISOR_URL, or None to use the template advisor directly."""
+    return Advisor(HttpBackend(ADVISOR_URL)) if ADVISOR_URL else None
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers batch requests with template advice after a fixed per-batch latency."""
+
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))))
+        time.sleep(self.latency)
+        choices = []
+        for item in request["batch"]:
+            prompt, _, rest = item["messages"][-1]["content"].rpartition("\nState: ")
+            advice = generate_business_advice(prompt, parse_digest(rest.split("\n", 1)[0]))
+            choices.append({"message": {"role": "assistant", "content": advice}})
+        body = json.dumps({"model": request.get("model"), "choices": choices}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    # Concurrent batches open several connections at once.
+    request_queue_size = 128
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the advisor model server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering each batch")
+    args = parser.parse_args()
+    StandInHandler.latency = args.latency
+    server = StandInServer((args.host, args.port), StandInHandler)
+    print(f"advisor stand-in on http://{args.host}:{args.port}/v1/advice")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
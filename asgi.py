@@ -0,0 +1,261 @@
+"""ASGI variant of the simulation API.
+
+Serves the same routes as the Flask app in app.py from an async server:
+
+    uvicorn asgi:application            # one process
+    python serve.py --workers 4         # production launcher, see serve.py
+
+Each request's session work, including the journal append and any
+flock wait, runs on a thread pool so the event loop never blocks on disk
+I/O; snapshots are already written by the background StateWriter.
+"""
+import asyncio
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+import app as simulation
+
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get("ASGI_THREADS", "16")), thread_name_prefix="asgi")
+
+JSON = b"application/json"
+
+
+class Request:
+    def __init__(self, scope, body):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = parse_qs(scope.get("query_string", b"").decode())
+        self.headers = {k.decode().lower(): v.decode() for k, v in scope.get("headers", [])}
+        self.body = body
+        self.new_session_id = None
+
+    def full_state(self):
+        return self.query.get("full", [""])[0] in ("1", "true")
+
+    def json(self):
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+    def session_id(self):
+        """Same resolution as app.session_id(): header, then cookie, else a new id."""
+        sid = self.headers.get("x-session-id")
+        if not sid:
+            cookie = SimpleCookie(self.headers.get("cookie", ""))
+            if simulation.SESSION_COOKIE in cookie:
+                sid = cookie[simulation.SESSION_COOKIE].value
+        if not sid or not simulation.SESSION_ID_RE.match(sid):
+            sid = self.new_session_id = secrets.token_hex(16)
+        return sid
+
+
+async def in_session(request, fn, *args):
+    """Run fn(session, *args) under the caller's session on the thread pool."""
+    def work():
+        with simulation.store.session(request.session_id()) as session:
+            return fn(session, *args)
+    return await asyncio.get_running_loop().run_in_executor(executor, work)
+
+
+def asset_response(request, asset):
+    """Handler result for a static_cache Asset, with its validation headers."""
+    status, body, headers = asset.respond(request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
+    return status, body, asset.content_type.encode(), [(name.lower().encode(), value.encode()) for name, value in headers]
+
+
+async def index(request):
+    # Stats the file and only reads it when it changed.
+    asset = await asyncio.get_running_loop().run_in_executor(executor, simulation.PAGE.get)
+    return asset_response(request, asset)
+
+
+async def get_metrics(request):
+    return 200, simulation.metrics.render().encode(), b"text/plain; version=0.0.4"
+
+
+async def get_profile(request):
+    reset = request.query.get("reset", [""])[0] == "1"
+    return 200, simulation.PROFILER.folded(reset=reset).encode(), b"text/plain"
+
+
+async def get_state(request):
+    body = await in_session(request, simulation.state_payload)
+    return 200, body.encode(), JSON
+
+
+async def get_stream(request):
+    """Server-sent events; same protocol as the Flask /api/stream route."""
+    since = request.query.get("since", [None])[0]
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = last_event_id
+    since = int(since) if since and since.isdigit() else None
+
+    loop = asyncio.get_running_loop()
+    updates = asyncio.Queue()
+    sid = request.session_id()
+    store = simulation.store
+    subscription = store.subscribe(
+        sid,
+        lambda delta: loop.call_soon_threadsafe(updates.put_nowait, delta),
+        lambda session: simulation.stream_start(session, since),
+    )
+
+    async def events():
+        initial = await loop.run_in_executor(executor, subscription.__enter__)
+        try:
+            for message in initial:
+                yield message.encode()
+            quiet_since = time.monotonic()
+            while True:
+                try:
+                    delta = await asyncio.wait_for(updates.get(), simulation.STREAM_POLL)
+                except asyncio.TimeoutError:
+                    if store.shared:
+                        await loop.run_in_executor(executor, store.refresh, sid)
+                    if updates.empty() and time.monotonic() - quiet_since >= simulation.STREAM_KEEPALIVE:
+                        quiet_since = time.monotonic()
+                        yield b": keep-alive\n\n"
+                    continue
+                quiet_since = time.monotonic()
+                yield simulation.delta_message(delta).encode()
+        finally:
+            await loop.run_in_executor(executor, subscription.__exit__, None, None, None)
+
+    return 200, events(), b"text/event-stream"
+
+
+async def get_locations(request):
+    try:
+        day = int(request.query.get("day", ["1"])[0])
+    except ValueError:
+        day = 1
+    # A far day simulates the regional path up to it, and a new body is
+    # compressed, so both stay off the event loop.
+    asset = await asyncio.get_running_loop().run_in_executor(
+        executor, lambda: simulation.LOCATION_ASSETS.get(simulation.engine.locations_json(day)))
+    return asset_response(request, asset)
+
+
+async def get_market_report(request):
+    body = await in_session(request, lambda session: simulation.game_markets(session).report_json())
+    return asset_response(request, simulation.MARKET_REPORT_ASSETS.get(body))
+
+
+async def post_ai_chat(request):
+    data = request.json()
+    user_prompt = data.get("prompt", "").strip() if data else ""
+    payload = await in_session(request, simulation.chat, user_prompt, request.full_state())
+    if "advice" in payload:
+        # Awaited on the event loop, so no thread waits on the model server.
+        payload["response"] = await simulation.ADVISOR.advise_async(user_prompt, payload.pop("advice"))
+    return 200, payload, JSON
+
+
+async def post_events(request):
+    return 200, await in_session(request, simulation.roll_event, request.full_state()), JSON
+
+
+async def post_advance_day(request):
+    days, error = simulation.parse_days(request.query.get("days", ["1"])[0])
+    if error:
+        return 400, error, JSON
+    return 200, await in_session(request, simulation.advance_days, days, request.full_state()), JSON
+
+
+ROUTES = {
+    ("GET", "/"): index,
+    ("GET", "/api/metrics"): get_metrics,
+    ("GET", "/api/profile"): get_profile,
+    ("GET", "/api/state"): get_state,
+    ("GET", "/api/stream"): get_stream,
+    ("GET", "/api/locations"): get_locations,
+    ("GET", "/api/market-report"): get_market_report,
+    ("POST", "/api/ai-chat"): post_ai_chat,
+    ("POST", "/api/events"): post_events,
+    ("POST", "/api/advance-day"): post_advance_day,
+}
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await asyncio.get_running_loop().run_in_executor(executor, shutdown)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def shutdown():
+    simulation.store.close()
+    simulation.writer.close()
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    started = time.perf_counter()
+    request = Request(scope, await read_body(receive))
+    handler = ROUTES.get((request.method, request.path))
+    if handler is None:
+        status, body, content_type, extra = 404, {"error": "Not found"}, JSON, ()
+    else:
+        status, body, content_type, *extra = await handler(request)
+    streaming = hasattr(body, "__anext__")
+    if not streaming and not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    simulation.observe_request(request.method, request.path if handler else "unmatched", status,
+                               time.perf_counter() - started, None if streaming else len(body))
+
+    # Handlers return (status, body, content type), optionally with a list of extra headers.
+    headers = [(b"content-type", content_type)] + (list(extra[0]) if extra else [])
+    if streaming:
+        headers.append((b"cache-control", b"no-cache"))
+    elif status != 304:
+        headers.append((b"content-length", str(len(body)).encode()))
+    if request.new_session_id:
+        cookie = f"{simulation.SESSION_COOKIE}={request.new_session_id}; HttpOnly; Path=/; SameSite=Lax"
+        headers.append((b"set-cookie", cookie.encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    if streaming:
+        await stream_body(body, receive, send)
+    else:
+        await send({"type": "http.response.body", "body": body})
+
+
+async def stream_body(chunks, receive, send):
+    """Send chunks until the iterator ends or the client disconnects."""
+    async def wait_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    disconnected = asyncio.ensure_future(wait_disconnect())
+    try:
+        async for chunk in chunks:
+            if disconnected.done():
+                break
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        disconnected.cancel()
+        await chunks.aclose()
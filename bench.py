@@ -0,0 +1,277 @@
+"""Benchmarks for the simulation core and a load generator for the HTTP API.
+
+    python bench.py micro                                   # core microbenchmarks
+    python bench.py load --requests 5000 --concurrency 8    # in-process Flask test client
+    python bench.py load --url http://127.0.0.1:8080        # a running server (serve.py)
+    python bench.py all --json bench-results.json
+    python bench.py micro --compare bench-results.json      # show ratios against a saved run
+
+Microbenchmarks time command dispatch, advice rendering, day advancement
+and state serialization and persistence. Each reports the best and median
+time per call over several autoranged repeats, plus the peak memory
+allocated by one timed batch, measured with tracemalloc in a separate
+pass.
+
+The load generator replays a seeded mix of state reads, day advances,
+chat commands and event rolls from `--players` sessions at the given
+concurrency. It reports throughput and p50/p90/p99 latency, overall and
+per route. In-process runs can also trace allocations (`--allocations`),
+which slows them down. In-process runs use a throwaway SESSION_DIR unless
+one is set.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import engine
+from advice import generate_business_advice, render_advice
+from persistence import Journal, write_json_atomic
+from world import WorldState
+
+CHAT_PROMPTS = [
+    "check state", "advance day", "go to london", "visit shanghai", "invest 50000", "research",
+    "do something", "market report", "ai prompt", "help",
+    "how should I invest my capital?", "what is the growth strategy?", "is this good market timing?",
+]
+
+# (weight, method, path); chat requests pick a prompt from CHAT_PROMPTS.
+REQUEST_MIX = [
+    (40, "GET", "/api/state"),
+    (20, "POST", "/api/advance-day"),
+    (30, "POST", "/api/ai-chat"),
+    (10, "POST", "/api/events"),
+]
+
+
+def run_timed(fn, repeat=5):
+    """Best and median seconds per call of fn over `repeat` autoranged batches."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return number, min(times), float(np.median(times))
+
+
+def peak_allocated(fn, number):
+    """Peak bytes allocated while calling fn `number` times."""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for _ in range(number):
+            fn()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def micro_cases(directory):
+    """(name, callable) pairs; each callable is one operation."""
+    game = engine.Game(seed=1)
+    state = game.state
+    for _ in range(engine.MAX_RECENT_EVENTS):
+        engine.add_event(game, "Day advanced. Gained $50,000 income.")
+    prompts = iter(CHAT_PROMPTS * 1_000_000)
+    advice_state = {"location": "Mars", "money": 1_234_567, "population": 5000}
+    encoded = state.to_json()
+    default = engine.new_state()
+    journal = Journal(os.path.join(directory, "bench.journal.jsonl"), state)
+    snapshot_path = os.path.join(directory, "bench.json")
+    day_game = engine.Game(seed=2)
+    year_game = engine.Game(seed=3)
+
+    def journal_record():
+        state["day"] += 1
+        journal.record(state, events=["Day 1: benchmark"])
+
+    return [
+        ("commands.match", lambda: engine.COMMANDS.match(next(prompts))),
+        ("engine.ai_chat status", lambda: engine.ai_chat(game, "check state")),
+        ("advice.render cached", lambda: generate_business_advice("how should I invest?", advice_state)),
+        ("advice.render uncached", lambda: render_advice.__wrapped__("invest", "Mars", 1_234_000, 5000)),
+        ("engine.advance 1 day", lambda: engine.advance(day_game, 1)),
+        ("engine.advance 365 days", lambda: engine.advance(year_game, 365)),
+        ("state.to_json", state.to_json),
+        ("state.load", lambda: WorldState.from_dict(json.loads(encoded), default)),
+        ("journal.record", journal_record),
+        ("snapshot.write", lambda: write_json_atomic(snapshot_path, journal.snapshot())),
+    ]
+
+
+def run_micro(repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, fn in micro_cases(directory):
+            number, best, median = run_timed(fn, repeat)
+            results[name] = {
+                "calls": number,
+                "best_us": round(best * 1e6, 3),
+                "median_us": round(median * 1e6, 3),
+                "peak_alloc_kb": round(peak_allocated(fn, number) / 1024, 1),
+            }
+            print(f"{name:28} {results[name]['median_us']:>12.2f} us  (best {results[name]['best_us']:.2f})"
+                  f"  {results[name]['peak_alloc_kb']:>9.1f} KB peak", file=sys.stderr)
+    return results
+
+
+def request_plan(count, players, seed):
+    """A seeded list of (player, method, path, body) requests drawn from REQUEST_MIX."""
+    rng = random.Random(seed)
+    weights = [weight for weight, _, _ in REQUEST_MIX]
+    plan = []
+    for _ in range(count):
+        _, method, path = rng.choices(REQUEST_MIX, weights)[0]
+        body = None
+        if path == "/api/ai-chat":
+            body = {"prompt": rng.choice(CHAT_PROMPTS)}
+        elif path == "/api/advance-day":
+            path += f"?days={rng.choice((1, 1, 1, 7, 30))}"
+        plan.append((f"bench-{rng.randrange(players)}", method, path, body))
+    return plan
+
+
+def local_sender():
+    """Send requests through the Flask test client, one client per thread."""
+    os.environ.setdefault("SESSION_DIR", tempfile.mkdtemp(prefix="bench-sessions-"))
+    import app
+    clients = threading.local()
+
+    def send(player, method, path, body):
+        client = getattr(clients, "client", None)
+        if client is None:
+            client = clients.client = app.app.test_client()
+        response = client.open(path, method=method, json=body, headers={"X-Session-Id": player})
+        return response.status_code
+    return send
+
+
+def http_sender(url):
+    def send(player, method, path, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(url.rstrip("/") + path, data=data, method=method,
+                                         headers={"X-Session-Id": player, "Content-Type": "application/json"})
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            return response.status
+    return send
+
+
+def run_load(args):
+    plan = request_plan(args.requests, args.players, args.seed)
+    send = http_sender(args.url) if args.url else local_sender()
+    latencies = np.empty(len(plan))
+    failures = []
+
+    def run(i):
+        start = time.perf_counter()
+        try:
+            status = send(*plan[i])
+        except Exception as exc:
+            status = repr(exc)
+        latencies[i] = time.perf_counter() - start
+        if status != 200:
+            failures.append(status)
+
+    trace = args.allocations and not args.url
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run, range(len(plan))))
+    elapsed = time.perf_counter() - started
+    result = {
+        "target": args.url or "flask-test-client",
+        "requests": len(plan),
+        "players": args.players,
+        "concurrency": args.concurrency,
+        "errors": len(failures),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(plan) / elapsed, 1),
+        "latency_ms": latency_summary(latencies),
+        "routes": {},
+    }
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["allocations"] = {"retained_kb": round(current / 1024, 1), "peak_kb": round(peak / 1024, 1)}
+    routes = np.array([f"{method} {path.split('?')[0]}" for _, method, path, _ in plan])
+    for route in sorted(set(routes)):
+        selected = latencies[routes == route]
+        result["routes"][route] = dict(count=len(selected), **latency_summary(selected))
+    if failures:
+        result["first_error"] = str(failures[0])
+    print(f"{result['throughput_rps']} req/s, p50 {result['latency_ms']['p50']} ms, "
+          f"p99 {result['latency_ms']['p99']} ms, {result['errors']} errors", file=sys.stderr)
+    return result
+
+
+def latency_summary(seconds):
+    p50, p90, p99 = np.percentile(seconds, [50, 90, 99]) * 1000
+    return {"p50": round(p50, 3), "p90": round(p90, 3), "p99": round(p99, 3), "max": round(seconds.max() * 1000, 3)}
+
+
+def compare(results, baseline):
+    """Print new/old ratios for every metric present in both runs."""
+    for name, new in results.get("micro", {}).items():
+        old = baseline.get("micro", {}).get(name)
+        if old:
+            print(f"{name:28} {old['median_us']:>10.2f} -> {new['median_us']:>10.2f} us  x{new['median_us'] / old['median_us']:.2f}")
+    new, old = results.get("load"), baseline.get("load")
+    if new and old:
+        print(f"{'load throughput':28} {old['throughput_rps']:>10} -> {new['throughput_rps']:>10} req/s"
+              f"  x{new['throughput_rps'] / old['throughput_rps']:.2f}")
+        for q in ("p50", "p99"):
+            print(f"{'load ' + q:28} {old['latency_ms'][q]:>10} -> {new['latency_ms'][q]:>10} ms"
+                  f"  x{new['latency_ms'][q] / old['latency_ms'][q]:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Open World Life Simulator.")
+    parser.add_argument("suite", choices=["micro", "load", "all"])
+    parser.add_argument("--repeat", type=int, default=5, help="timed batches per microbenchmark")
+    parser.add_argument("--url", help="load-test a running server instead of the in-process app")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the request mix")
+    parser.add_argument("--allocations", action="store_true", help="trace allocations during an in-process load run")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+    if args.suite in ("micro", "all"):
+        results["micro"] = run_micro(args.repeat)
+    if args.suite in ("load", "all"):
+        results["load"] = run_load(args)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    if not args.json and not args.compare:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
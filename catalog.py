@@ -0,0 +1,121 @@
+"""The content pack: world catalogs loaded from content/*.json and compiled once.
+
+    locations.json   {"locations": {name: {...}}, "aliases": {alias: name}}
+    markets.json     {name: {"index", "volatility", "sector"}}
+    events.json      {key: {"name", "location", "effect", "chance", "description"}}
+    ai_prompts.json  [prompt, ...]
+
+load() reads the pack on first use and compiles it into the lookup
+tables the engine runs on: the event alias tables, the regional economy
+(with its first block of days already simulated), the location alias
+index and the venture command pattern. The compiled Catalog is pickled
+to CONTENT_CACHE_DIR under a hash of the content files and of the
+modules that compile them, so later processes skip both the JSON parse
+and the compile, and any edit to either rebuilds it.
+
+preload() loads the pack and moves everything allocated so far into the
+garbage collector's permanent generation. Call it in a server's parent
+process before workers fork (app.py does when PRELOAD_CONTENT=1):
+collections in the workers then never write to those objects, so their
+pages stay shared.
+"""
+import gc
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+import threading
+
+import commands
+import events
+import regions
+from commands import LocationIndex
+from events import EventSampler
+from regions import RegionalEconomy
+
+CONTENT_DIR = os.environ.get("CONTENT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "content"))
+CONTENT_CACHE_DIR = os.environ.get("CONTENT_CACHE_DIR", os.path.join(CONTENT_DIR, "__pycache__"))
+CONTENT_FILES = ("locations.json", "markets.json", "events.json", "ai_prompts.json")
+# Modules whose code shapes the compiled tables; editing one invalidates the cache.
+COMPILERS = (__file__, commands.__file__, events.__file__, regions.__file__)
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+class Catalog:
+    """The catalogs of one content pack and the tables compiled from them."""
+
+    def __init__(self, locations, aliases, markets, events, ai_prompts):
+        self.locations = locations
+        self.markets = markets
+        self.events = events
+        self.ai_prompts = ai_prompts
+        self.event_sampler = EventSampler(events, locations)
+        self.regions = RegionalEconomy(locations)
+        self.regions.rows([1])
+        self.location_index = LocationIndex(locations, aliases)
+        self.market_levels = {name: market["index"] for name, market in markets.items()}
+        self.venture_pattern = "|".join(re.escape(p.lower()) for p in ai_prompts + ["do something"])
+
+    @classmethod
+    def read(cls, directory):
+        data = {}
+        for name in CONTENT_FILES:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                data[name] = json.load(f)
+        locations = data["locations.json"]
+        return cls(locations["locations"], locations.get("aliases", {}), data["markets.json"],
+                   data["events.json"], data["ai_prompts.json"])
+
+
+def content_hash(directory):
+    digest = hashlib.sha256()
+    for path in [os.path.join(directory, name) for name in CONTENT_FILES] + list(COMPILERS):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def load(directory=CONTENT_DIR):
+    """The compiled Catalog for a content directory, built or unpickled on first call."""
+    catalog = _loaded.get(directory)
+    if catalog is not None:
+        return catalog
+    with _lock:
+        if directory not in _loaded:
+            _loaded[directory] = _load(directory)
+        return _loaded[directory]
+
+
+def _load(directory):
+    cache_dir = CONTENT_CACHE_DIR if directory == CONTENT_DIR else os.path.join(directory, "__pycache__")
+    cache_path = os.path.join(cache_dir, f"catalog-{content_hash(directory)}.pickle")
+    try:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # Missing, truncated or stale (pickled by code that has since
+        # changed in a way the hash missed): compile it afresh.
+        pass
+    catalog = Catalog.read(directory)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(catalog, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except OSError:
+        # A read-only checkout just compiles on every start.
+        pass
+    return catalog
+
+
+def preload(directory=CONTENT_DIR):
+    """Load the pack and freeze the heap so forked workers share it."""
+    catalog = load(directory)
+    gc.collect()
+    gc.freeze()
+    return catalog
@@ -0,0 +1,89 @@
+import re
+
+
+class CommandRouter:
+    """Registry of chat commands dispatched through one compiled regex.
+
+    Every command contributes a pattern; the patterns are joined into a
+    single alternation with one named group per command, compiled once on
+    first use (and again only if the registry changes). Dispatch is one
+    scan of the input no matter how many commands are registered. When
+    several commands occur in the same input, the one registered first
+    wins, matching the old if/elif order.
+
+    Patterns match against lowercased input and may define their own named
+    groups (e.g. an amount), which must be unique across commands. A
+    pattern may also be a callable returning the pattern, called when the
+    router compiles, for patterns built from data loaded on first use.
+    """
+
+    def __init__(self):
+        self.commands = []
+        self._regex = None
+
+    def register(self, pattern, handler, name=None):
+        self.commands.append((name or handler.__name__, pattern, handler))
+        self._regex = None
+
+    def command(self, pattern, name=None):
+        """Decorator form of register()."""
+        def decorator(handler):
+            self.register(pattern, handler, name)
+            return handler
+        return decorator
+
+    def compile(self):
+        alternation = "|".join(
+            f"(?P<_cmd{i}>{pattern() if callable(pattern) else pattern})" for i, (_, pattern, _) in enumerate(self.commands)
+        )
+        self._regex = re.compile(alternation)
+        return self._regex
+
+    def match(self, text):
+        """Return (name, handler, match) for the highest-priority command in text, or None."""
+        regex = self._regex or self.compile()
+        best = None
+        for m in regex.finditer(text):
+            index = int(m.lastgroup[4:])
+            if best is None or index < best[0]:
+                best = (index, m)
+                if index == 0:
+                    break
+        if best is None:
+            return None
+        name, _, handler = self.commands[best[0]]
+        return name, handler, best[1]
+
+    def dispatch(self, text, *args):
+        """Run the matching command's handler(*args, text, match); None when nothing matches."""
+        found = self.match(text)
+        if found is None:
+            return None
+        _, handler, m = found
+        return handler(*args, text, m)
+
+
+class LocationIndex:
+    """Alias index over location names, searched with one compiled regex.
+
+    Aliases are the lowercased full name plus every leading run of words
+    ("san", "san francisco", ...) that identifies exactly one location.
+    """
+
+    def __init__(self, locations, extra_aliases=None):
+        counts = {}
+        candidates = {}
+        for name in locations:
+            words = name.lower().split()
+            for n in range(1, len(words) + 1):
+                alias = " ".join(words[:n])
+                candidates[alias] = name
+                counts[alias] = counts.get(alias, 0) + 1
+        self.aliases = {alias: name for alias, name in candidates.items() if counts[alias] == 1}
+        self.aliases.update(extra_aliases or {})
+        ordered = sorted(self.aliases, key=len, reverse=True)
+        self._regex = re.compile(r"\b(?:" + "|".join(re.escape(a) for a in ordered) + r")\b")
+
+    def find(self, text, pos=0):
+        m = self._regex.search(text, pos)
+        return self.aliases[m.group(0)] if m else None
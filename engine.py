@@ -0,0 +1,385 @@
+"""Headless simulation engine: the world rules and the chat commands.
+
+Everything here acts on a *game*: any object with `state` (WorldState),
+`key` (the spawn key of its random streams), `rngs`, `markets`, `command`
+and `pending` attributes and a `record(events=(), reset=False)` method,
+which is called once per command that changed state (or after every
+mutation made outside play()). Game below is the plain in-memory
+implementation used by simulate.py; the server's Session journals,
+publishes and saves the change on record().
+
+All randomness comes from the game's seeded streams, and every mutation
+saves the streams' positions in the state, so replaying a game's command
+log from the same seed reproduces its state bit for bit.
+"""
+import json
+from functools import lru_cache
+
+import numpy as np
+
+import catalog
+from advice import generate_business_advice
+from commands import CommandRouter
+from markets import MarketSimulator
+from metrics import Counter, Histogram
+from regions import HORIZON_DAYS
+from rng import SUBSYSTEMS, RandomStreams, new_seed
+from stepper import WorldBatch
+from world import MAX_RECENT_EVENTS, WorldState
+
+# The catalogs live in the content pack (content/*.json) and are loaded
+# and compiled on first use; see catalog.py. The old module-level names
+# still resolve, through __getattr__ below.
+CATALOG_ATTRIBUTES = {
+    "LOCATIONS": "locations",
+    "MARKETS": "markets",
+    "EVENTS": "events",
+    "AI_PROMPTS": "ai_prompts",
+    "EVENT_SAMPLER": "event_sampler",
+    "REGIONS": "regions",
+    "LOCATION_INDEX": "location_index",
+}
+
+COMMANDS_TOTAL = Counter("sim_commands_total", "Chat commands run, by command; unmatched prompts count as advice.", ("command",))
+COMMAND_SECONDS = Histogram("sim_command_seconds", "Time to run a chat command, by command.", labels=("command",))
+ADVICE_SECONDS = Histogram("sim_advice_seconds", "Time to render business advice for an unmatched prompt.")
+LOG_EVENTS_SECONDS = Histogram("sim_log_events_seconds", "Time to log event lines, journal append included.")
+
+def content():
+    """The compiled content pack."""
+    return catalog.load()
+
+def __getattr__(name):
+    if name in CATALOG_ATTRIBUTES:
+        return getattr(content(), CATALOG_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def new_state(first_event="Simulation started", seed=None):
+    return WorldState(
+        money=1000000,
+        population=5000,
+        happiness=60,
+        location="New York City",
+        day=1,
+        energy=100,
+        security=70,
+        recent_events=[first_event],
+        cash_invested=0,
+        dividends_received=0,
+        markets=content().market_levels,
+        seed=new_seed() if seed is None else seed,
+        rng={name: 0 for name in SUBSYSTEMS},
+        capital={},
+    )
+
+class Game:
+    """A world played in memory with nothing persisted.
+
+    Its random streams come from the state's seed and `key` (see rng.py),
+    so the same seed, key and commands always replay the same game.
+    Commands run through play() are kept in `log`.
+    """
+
+    def __init__(self, state=None, seed=None, key=()):
+        self.state = state if state is not None else new_state(seed=seed)
+        self.key = tuple(key)
+        self.rngs = None
+        self.markets = None
+        self.command = None
+        self.pending = None
+        self.log = []
+
+    def record(self, events=(), reset=False):
+        if self.command is not None:
+            self.log.append(self.command)
+            self.command = None
+
+def game_rng(game, subsystem="economy"):
+    """The game's stream for one subsystem (see rng.SUBSYSTEMS)."""
+    if game.rngs is None:
+        state = game.state
+        game.rngs = RandomStreams(state["seed"], game.key, state["rng"])
+    return game.rngs[subsystem]
+
+def game_markets(game):
+    if game.markets is None:
+        state = game.state
+        markets = MarketSimulator(content().markets, state["markets"])
+        # Every day of this game ticked the markets once, so their recent
+        # history is the market stream's last draws, replayed.
+        position = game_rng(game, "markets").draws
+        days = min(markets.capacity, state["day"] - 1, position // markets.draws_per_day)
+        if days > 0:
+            start = position - days * markets.draws_per_day
+            markets.rebuild_history(RandomStreams(state["seed"], game.key, {"markets": start})["markets"], days)
+        game.markets = markets
+    return game.markets
+
+def record(game, events=(), reset=False):
+    """Record a mutation, saving the stream positions along with it.
+
+    Inside play() the mutation is only noted in `game.pending`; play()
+    records everything the command did at once when it returns.
+    """
+    pending = game.pending
+    if pending is not None:
+        pending["events"].extend(events)
+        pending["reset"] = pending["reset"] or reset
+        pending["changed"] = True
+        return
+    if game.rngs is not None:
+        game.state["rng"] = game.rngs.positions()
+    game.record(events=events, reset=reset)
+
+def sync_rng(game):
+    """Record draws made by a command that changed nothing else."""
+    if game.rngs is not None and game.rngs.positions() != game.state["rng"]:
+        record(game)
+
+@LOG_EVENTS_SECONDS.time()
+def log_events(game, lines):
+    """Append already-dated event lines and record them as one mutation."""
+    game.state["recent_events"].extend(lines)
+    record(game, events=lines)
+
+def add_event(game, description):
+    log_events(game, [f"Day {game.state['day']}: {description}"])
+
+def invest(game, amount):
+    """Move `amount` of cash into the current location's capital."""
+    state = game.state
+    location = state["location"]
+    capital = dict(state["capital"])
+    capital[location] = capital.get(location, 0) + amount
+    state["capital"] = capital
+    state["cash_invested"] += amount
+
+def local_rates(game):
+    """(wage, return on capital) the current location pays this world tomorrow."""
+    state = game.state
+    return content().regions.rates(state["location"], state["day"] + 1, state["population"], state["capital"])
+
+def locations_json(day=1):
+    """The /api/locations body: each location with its regional aggregates on `day`."""
+    return _locations_json(min(max(day, 1), HORIZON_DAYS))
+
+@lru_cache(maxsize=64)
+def _locations_json(day):
+    aggregates = content().regions.aggregates(day)
+    return json.dumps({name: dict(location, economy=aggregates[name]) for name, location in content().locations.items()})
+
+def reset_state(game):
+    """Start a new game in place; the seed and stream positions carry on."""
+    state = game.state
+    positions = state["rng"]
+    state.update(new_state("New game started", seed=state["seed"]))
+    state["rng"] = positions
+    game.markets = None
+    record(game, reset=True)
+
+def advance(game, days=1):
+    """Advance the game's world by `days` days in one batch step.
+
+    Random events roll once per day at the current location and land as
+    batched deltas; only the latest MAX_RECENT_EVENTS of them are logged.
+    Market indices move along with the days, and income follows the
+    regional economy's wages and returns. Returns (income earned, number
+    of events fired).
+    """
+    state = game.state
+    first_day = state["day"] + 1
+    sampler = content().event_sampler
+    batch = WorldBatch.from_states([state], game_rng(game), sampler, game_rng(game, "events"), content().regions)
+    income, fired = batch.advance(days)
+    batch.apply_to([state])
+    markets = game_markets(game)
+    markets.tick(game_rng(game, "markets"), days)
+    state["markets"] = markets.levels()
+    income = int(income[0])
+    fired_days = np.flatnonzero(fired[:, 0] != sampler.none)
+    lines = [f"Day {first_day + d}: {sampler.describe(fired[d, 0])}" for d in fired_days[-MAX_RECENT_EVENTS:]]
+    if days == 1:
+        lines.append(f"Day {state['day']}: Day advanced. Gained ${income:,} income.")
+    else:
+        lines.append(f"Day {state['day']}: Advanced {days} days. Gained ${income:,} income, {len(fired_days)} events.")
+    log_events(game, lines)
+    return income, len(fired_days)
+
+COMMANDS = CommandRouter()
+
+HELP_TEXT = """
+AVAILABLE COMMANDS:
+• "go to [location]" - Travel to a location (San Francisco Bay Area, New York City, London, Shanghai, Texas Hill Country)
+• "do something" - Execute a random business venture or investment
+• "check state" - View current simulation status
+• "advance day" - Fast-forward time (gain income, face events)
+• "invest [amount]" - Invest money in ventures at your current location (e.g., "invest 50000")
+• "research [topic]" - Perform research in technology or finance
+• "reset" - Start a new simulation
+• "ai prompt" - Get a real AI-style business prompt to execute
+• "market report" - View current market indices
+
+EXAMPLES:
+"I want to go to San Francisco"
+"Invest 100000 in green technology"
+"Execute this AI prompt: Launch a cryptocurrency exchange"
+"""
+
+RESEARCH_TOPICS = ["AI Models", "Clean Energy", "Quantum Computing", "FinTech", "Biotech", "Space Technology"]
+
+# Location commands
+@COMMANDS.command(r"go to|visit")
+def travel_command(game, prompt, match):
+    state = game.state
+    locations = content().locations
+    loc = content().location_index.find(prompt, match.end())
+    if loc is None:
+        location_name = prompt[match.end():].strip()
+        return {"response": f"Location '{location_name}' not found. Available: {list(locations.keys())}"}
+    state["location"] = loc
+    add_event(game, f"Travelled to {loc}")
+    wage, capital_return = local_rates(game)
+    return {"response": f"You've moved to {loc}. {locations[loc]['description']}. "
+                        f"Local wages ${wage:,.2f} per employee a day, capital returns {capital_return:.2%} a day."}
+
+# AI prompt-style actions
+@COMMANDS.command(lambda: content().venture_pattern)
+def venture_command(game, prompt, match):
+    state = game.state
+    rng = game_rng(game)
+    action = game_rng(game, "flavor").choice(content().ai_prompts)
+    capital = rng.randint(2000, 8000)
+    happiness = rng.randint(5, 15)
+    personnel = rng.randint(10, 100)
+    state["money"] += capital
+    state["happiness"] += happiness
+    state["population"] += personnel
+    invest(game, rng.randint(50000, 200000))
+    add_event(game, f"Executed: {action}")
+    return {"response": f"Action completed successfully: {action} ✅\nWe've allocated funds and expanded operations. +${capital} capital, {happiness} happiness gain, {personnel} new personnel."}
+
+# Command prompts
+@COMMANDS.command(r"help")
+def help_command(game, prompt, match):
+    return {"response": HELP_TEXT}
+
+@COMMANDS.command(r"check state|status")
+def status_command(game, prompt, match):
+    state = game.state
+    market_index = state["markets"]["S&P 500"]
+    return {
+        "response": f"📊 CURRENT STATUS: Day {state['day']}, Wealth: ${state['money']:,.0f}, Happiness: {state['happiness']}%, Population: {state['population']:,.0f}, S&P 500: {market_index:,.2f}"
+    }
+
+@COMMANDS.command(r"advance day")
+def advance_command(game, prompt, match):
+    state = game.state
+    income, _ = advance(game)
+    return {"response": f"⏱️ Day {state['day']} advanced. You've earned ${income:,} income.", "new_day": state["day"]}
+
+@COMMANDS.command(r"reset|new game")
+def reset_command(game, prompt, match):
+    reset_state(game)
+    add_event(game, "Simulation reset. New game started.")
+    return {"response": "🔄 Game reset. Starting fresh with $1,000,000 and your choice of headquarters in New York City."}
+
+@COMMANDS.command(r"invest(?:\s+(?P<amount>\d+))?")
+def invest_command(game, prompt, match):
+    state = game.state
+    if match.group("amount") is None:
+        return {"response": "Please specify an amount: invest [amount] (e.g., invest 50000)"}
+    amount = int(match.group("amount"))
+    if amount > state["money"]:
+        return {"response": f"Insufficient funds. You have ${state['money']:,.0f}, but need ${amount:,}."}
+    state["money"] -= amount
+    invest(game, amount)
+    add_event(game, f"Invested ${amount:,} in {state['location']}")
+    _, capital_return = local_rates(game)
+    return {"response": f"💰 Invested ${amount:,} in {state['location']} ventures, currently returning {capital_return:.2%} a day."}
+
+@COMMANDS.command(r"research")
+def research_command(game, prompt, match):
+    state = game.state
+    state["happiness"] += 5
+    state["energy"] -= 10
+    add_event(game, f"Research completed in technology sector")
+    topic = game_rng(game, "flavor").choice(RESEARCH_TOPICS)
+    return {"response": f"🔬 Research completed: {topic} breakthrough discovered! +5 happiness, technology sector enhanced."}
+
+@COMMANDS.command(r"market report")
+def market_report_command(game, prompt, match):
+    report = game_markets(game).report()
+    return {"response": f"📈 MARKET REPORT:\n{report}"}
+
+@COMMANDS.command(r"ai prompt")
+def ai_prompt_command(game, prompt, match):
+    suggestion = game_rng(game, "flavor").choice(content().ai_prompts)
+    return {"response": f"Here's a real AI-style business prompt for you:\n\n{suggestion}\n\nType it as a command to execute it!"}
+
+def ai_chat(game, prompt):
+    """Run a chat command, or fall back to the business advisor when none matches."""
+    text = prompt.lower()
+    found = COMMANDS.match(text)
+    if found is None:
+        COMMANDS_TOTAL.inc("advice")
+        # Real-world business advisor logic
+        with ADVICE_SECONDS.time():
+            return {"response": generate_business_advice(prompt, game.state)}
+    name, handler, match = found
+    COMMANDS_TOTAL.inc(name)
+    with COMMAND_SECONDS.time(name):
+        return handler(game, text, match)
+
+def roll_event(game):
+    """Roll the current location's event table once; returns the event that fired, or None."""
+    state = game.state
+    sampler = content().event_sampler
+    slot, accept = game_rng(game, "events").random(2)
+    event_id = int(sampler.sample(sampler.location_ids([state["location"]]), slot, accept)[0])
+    if event_id == sampler.none:
+        return None
+    event = sampler.events[event_id]
+    for field, delta in event["effect"].items():
+        state[field] += delta
+    text = sampler.describe(event_id)
+    add_event(game, text)
+    return {"name": event["name"], "effect": event["effect"], "text": text}
+
+# Operations a command log is made of: [op, *args].
+OPERATIONS = {
+    "chat": ai_chat,
+    "advance": advance,
+    "event": roll_event,
+}
+
+def play(game, op, *args):
+    """Run one logged operation and return its result.
+
+    Whatever the command changes is recorded as one mutation, tagged with
+    the command, so each command is one journal entry (one delta to
+    clients) and the journal (or Game.log) holds exactly the commands that
+    changed state.
+    """
+    game.command = [op, *args]
+    game.pending = pending = {"events": [], "reset": False, "changed": False}
+    try:
+        return OPERATIONS[op](game, *args)
+    finally:
+        game.pending = None
+        try:
+            if pending["changed"]:
+                # A reset entry carries the whole event list, lines logged
+                # after the reset included.
+                events = () if pending["reset"] else pending["events"]
+                record(game, events=events, reset=pending["reset"])
+            else:
+                sync_rng(game)
+        finally:
+            game.command = None
+
+def replay(commands, seed, key=()):
+    """Play a command log from a fresh game with the given seed; returns the Game."""
+    game = Game(seed=seed, key=key)
+    for command in commands:
+        play(game, *command)
+    return game
@@ -0,0 +1,83 @@
+import numpy as np
+
+EFFECT_FIELDS = ("money", "happiness", "security", "energy", "population")
+
+
+def build_alias(weights):
+    """Vose's alias method: returns (prob, alias) arrays for O(1) sampling."""
+    n = len(weights)
+    scaled = np.asarray(weights, dtype=np.float64) * n / sum(weights)
+    prob = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+
+class EventSampler:
+    """Constant-time daily event roll per location, built once from the EVENTS catalog.
+
+    Each location gets an alias table over its events, weighted by `chance`,
+    plus a "nothing happens" outcome carrying the leftover probability (when
+    a location's chances add up to more than 1 they are normalized instead).
+    Tables are padded into (locations, slots) arrays so a whole block of
+    world-days is sampled with a handful of array lookups. Outcome ids index
+    rows of `effects`; the last row is the all-zero "nothing happens" row.
+    """
+
+    def __init__(self, events, locations):
+        self.keys = list(events)
+        self.events = [events[k] for k in self.keys]
+        self.none = len(self.keys)
+        self.location_index = {loc: i for i, loc in enumerate(locations)}
+
+        self.effects = np.zeros((self.none + 1, len(EFFECT_FIELDS)), dtype=np.int64)
+        by_location = [[] for _ in self.location_index]
+        for event_id, event in enumerate(self.events):
+            for field, delta in event["effect"].items():
+                self.effects[event_id, EFFECT_FIELDS.index(field)] = delta
+            loc = self.location_index.get(event["location"])
+            if loc is not None:
+                by_location[loc].append(event_id)
+
+        # One extra row of tables for locations missing from the catalog.
+        tables = []
+        for event_ids in by_location + [[]]:
+            weights = [self.events[i]["chance"] for i in event_ids]
+            leftover = 1.0 - sum(weights)
+            if leftover > 0:
+                event_ids = event_ids + [self.none]
+                weights.append(leftover)
+            tables.append((event_ids, build_alias(weights)))
+
+        width = max(len(ids) for ids, _ in tables)
+        self.counts = np.array([len(ids) for ids, _ in tables], dtype=np.int64)
+        self.prob = np.ones((len(tables), width))
+        self.outcome = np.full((len(tables), width), self.none, dtype=np.int64)
+        self.alias = np.full((len(tables), width), self.none, dtype=np.int64)
+        for row, (event_ids, (prob, alias)) in enumerate(tables):
+            ids = np.array(event_ids, dtype=np.int64)
+            self.prob[row, :len(ids)] = prob
+            self.outcome[row, :len(ids)] = ids
+            self.alias[row, :len(ids)] = ids[alias]
+
+    def location_ids(self, locations):
+        unknown = len(self.location_index)
+        return np.array([self.location_index.get(loc, unknown) for loc in locations], dtype=np.int64)
+
+    def sample(self, location_ids, slot_uniforms, accept_uniforms):
+        """Roll one outcome per uniform pair; location_ids broadcasts against the uniforms."""
+        slot = np.floor(slot_uniforms * self.counts[location_ids]).astype(np.int64)
+        accept = accept_uniforms < self.prob[location_ids, slot]
+        return np.where(accept, self.outcome[location_ids, slot], self.alias[location_ids, slot])
+
+    def describe(self, event_id):
+        event = self.events[event_id]
+        return f"{event['name']}: {event['description']}"
@@ -0,0 +1,101 @@
+import json
+
+import numpy as np
+
+
+def standard_normals(uniforms):
+    """Box-Muller transform: pairs of uniforms along the last axis become pairs of normals."""
+    u1, u2 = uniforms[..., 0::2], uniforms[..., 1::2]
+    radius = np.sqrt(-2.0 * np.log1p(-u1))
+    angle = 2.0 * np.pi * u2
+    return np.concatenate([radius * np.cos(angle), radius * np.sin(angle)], axis=-1)
+
+
+class MarketSimulator:
+    """One world's market indices, evolved per simulated day as geometric Brownian motion.
+
+    `volatility` from the MARKETS catalog is the daily standard deviation
+    of returns in percent; the drift term keeps the expected level flat.
+    Levels compound by multiplication from the current level, so N days in
+    one tick, N single-day ticks, and a simulator rebuilt from saved
+    levels all land on bit-identical values. The last `capacity` days of
+    levels are kept in a preallocated ring, served as the report's
+    `history`; a simulator rebuilt from saved levels refills it with
+    rebuild_history(). The formatted report is rendered once per tick and
+    then served from cache.
+    """
+
+    def __init__(self, markets, levels=None, capacity=30):
+        self.names = list(markets)
+        self.sectors = [markets[name]["sector"] for name in self.names]
+        self.volatility = [markets[name]["volatility"] for name in self.names]
+        self.sigma = np.array(self.volatility) / 100.0
+        levels = levels or {}
+        self.level = np.array([float(levels.get(name, markets[name]["index"])) for name in self.names])
+        self.draws_per_day = len(self.names) + len(self.names) % 2
+        self.capacity = capacity
+        self._ring = np.empty((capacity, len(self.names)))
+        self._end = 0
+        self._size = 0
+        self._report = None
+        self._report_json = None
+
+    def tick(self, rng, days=1):
+        """Advance every index by `days` days using one pre-drawn block of uniforms."""
+        path = np.cumprod(np.vstack([self.level, self._growth(rng, days)]), axis=0)[1:]
+        self.level = path[-1]
+        self._push(path)
+        self._report = None
+        self._report_json = None
+
+    def rebuild_history(self, rng, days):
+        """Refill the ring with the last `days` days, from a stream positioned where they began.
+
+        The levels are worked back from the current ones, so the newest row
+        is exactly the current level.
+        """
+        if days <= 0:
+            return
+        growth = self._growth(rng, days)
+        # Row j is the level divided by the growth of every later day.
+        later = np.cumprod(np.vstack([np.ones(len(self.names)), growth[:0:-1]]), axis=0)[::-1]
+        self._end = self._size = 0
+        self._push(self.level / later)
+        self._report_json = None
+
+    def history(self):
+        """(days, markets) array of recent daily levels, oldest first, ending with the current one."""
+        order = (self._end - self._size + np.arange(self._size)) % self.capacity
+        return self._ring[order]
+
+    def levels(self):
+        return dict(zip(self.names, self.level.tolist()))
+
+    def _growth(self, rng, days):
+        shocks = standard_normals(rng.random((days, self.draws_per_day)))[:, :len(self.names)]
+        return np.exp(shocks * self.sigma - 0.5 * self.sigma ** 2)
+
+    def _push(self, rows):
+        rows = rows[-self.capacity:]
+        self._ring[(self._end + np.arange(len(rows))) % self.capacity] = rows
+        self._end = (self._end + len(rows)) % self.capacity
+        self._size = min(self._size + len(rows), self.capacity)
+
+    def report(self):
+        if self._report is None:
+            self._report = "\n".join(
+                f"{name}: {level:,.2f} (Volatility: {vol}) - {sector}"
+                for name, level, vol, sector in zip(self.names, self.level, self.volatility, self.sectors)
+            )
+        return self._report
+
+    def report_json(self):
+        """Serialized /api/market-report body, cached until the next tick."""
+        if self._report_json is None:
+            markets = {
+                name: {"index": round(float(level), 2), "volatility": vol, "sector": sector}
+                for name, level, vol, sector in zip(self.names, self.level, self.volatility, self.sectors)
+            }
+            history = {name: np.round(column, 2).tolist() for name, column in zip(self.names, self.history().T)}
+            self._report_json = json.dumps({"report": self.report(), "markets": markets, "history": history})
+        return self._report_json
@@ -0,0 +1,180 @@
+"""In-process metrics with a Prometheus text exposition, and a sampling profiler.
+
+Counters and histograms register themselves in REGISTRY when created and
+render() writes them all in the Prometheus text format. Each process keeps
+its own registry, so with several server workers a scrape sees whichever
+worker answered it.
+"""
+import bisect
+import collections
+import sys
+import threading
+import time
+from contextlib import ContextDecorator
+
+REGISTRY = []
+
+# Seconds; spans the sub-millisecond hot paths up to slow disk writes.
+TIME_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = collections.defaultdict(int)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets=TIME_BUCKETS, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *label_values):
+        """Context manager (or decorator) observing the wall time of its block."""
+        return _Timer(self, label_values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    labels = _labels(self.labels + ("le",), values + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _labels(self.labels, values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer(ContextDecorator):
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def _recreate_cm(self):
+        # A fresh timer per decorated call, so concurrent calls do not share a start time.
+        return _Timer(self.histogram, self.label_values)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack on a timer and counts identical stacks.
+
+    Nothing runs until start(), so a disabled profiler costs nothing.
+    folded() returns the counts in the collapsed-stack format that
+    flamegraph.pl and speedscope read: one `frame;frame;frame count` line
+    per distinct stack, root first.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def toggle(self, *_):
+        """Start or stop sampling; signature fits a signal handler."""
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def folded(self, reset=False):
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+            if reset:
+                self.stacks.clear()
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _run(self, stop):
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            samples = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                samples.append(";".join(reversed(stack)))
+            with self._lock:
+                self.stacks.update(samples)
@@ -0,0 +1,230 @@
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from metrics import Counter, Histogram
+from world import read_state
+
+JOURNAL_SECONDS = Histogram("sim_journal_record_seconds", "Time to diff state and append one journal entry.")
+SNAPSHOT_SECONDS = Histogram("sim_snapshot_write_seconds", "Time to encode and atomically write one snapshot.")
+SNAPSHOT_ERRORS = Counter("sim_snapshot_write_errors_total", "Snapshot writes that failed and were queued for retry.")
+
+log = logging.getLogger(__name__)
+
+
+def write_json_atomic(path, data):
+    """Write data as compact JSON to path via a temp file and rename.
+
+    A str is taken to be JSON already and written as is. Every write gets
+    its own temp file, so concurrent writers of one path (threads or
+    processes) never share one; the last rename wins.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            if isinstance(data, str):
+                f.write(data)
+            else:
+                json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class StateWriter:
+    """Write-behind saver: coalesces dirty state and flushes it on a background thread.
+
+    Callers mark a target dirty with the path to write and a callable that
+    returns the data to serialize. The writer flushes every `interval`
+    seconds, or sooner once `batch_size` changes have piled up, and always
+    on close() / interpreter exit. A target whose write fails is logged
+    and stays dirty, so the next flush retries it.
+    """
+
+    def __init__(self, interval=1.0, batch_size=50):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._dirty = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def mark_dirty(self, path, snapshot):
+        with self._cond:
+            self._dirty[path] = snapshot
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self):
+        """Write every dirty target now, on the calling thread."""
+        with self._cond:
+            dirty, self._dirty = self._dirty, {}
+            self._pending = 0
+        with self._io_lock:
+            for path, snapshot in dirty.items():
+                try:
+                    with SNAPSHOT_SECONDS.time():
+                        write_json_atomic(path, snapshot())
+                except Exception:
+                    SNAPSHOT_ERRORS.inc()
+                    log.exception("snapshot write to %s failed; will retry", path)
+                    with self._cond:
+                        # A newer snapshot marked meanwhile supersedes this one.
+                        self._dirty.setdefault(path, snapshot)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and self._pending < self.batch_size:
+                    self._cond.wait(self.interval)
+                if self._closed:
+                    return
+            self.flush()
+
+
+def replay_journal(path, state, offset=0, on_entry=None):
+    """Apply journal entries after byte offset to state; returns (last seq, end offset).
+
+    The seq is None when no entries were applied. A torn trailing line from an
+    interrupted append (the last line, without its newline) is ignored; the
+    returned offset points just before it. Any other line that does not
+    decode raises ValueError, so the entries after it are never truncated
+    away. on_entry, if given, is called with each applied entry.
+    """
+    seq = None
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return seq, 0
+    with f:
+        offset = min(offset, os.fstat(f.fileno()).st_size)
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                raise ValueError(f"corrupt journal entry at byte {offset} of {path}") from None
+            apply_entry(state, entry)
+            if on_entry is not None:
+                on_entry(entry)
+            seq = entry["seq"]
+            offset += len(line)
+    return seq, offset
+
+
+def apply_entry(state, entry):
+    recent = state["recent_events"]
+    if "reset" in entry:
+        recent.clear()
+        recent.extend(entry["reset"])
+    state.update(entry["set"])
+    recent.extend(entry.get("events", ()))
+
+
+def load_journaled_state(snapshot_path, journal_path, default):
+    """Rebuild state from the latest snapshot plus the journal tail written after it.
+
+    `default` is a fresh WorldState that fills any field the snapshot lacks.
+    Returns (state, seq, offset) where seq/offset describe the journal end.
+    """
+    state, meta = read_state(snapshot_path, default)
+    seq, offset = replay_journal(journal_path, state, meta.get("offset", 0))
+    if seq is None:
+        seq = meta.get("seq", 0)
+    return state, seq, offset
+
+
+class Journal:
+    """Append-only JSON-lines log of every state mutation.
+
+    Each entry holds the fields that changed since the previous entry (as
+    absolute values, so replay is idempotent) plus any new event lines and,
+    when a command produced it, the command itself (see engine.play), so
+    the journal doubles as a replayable command log. The journal keeps its
+    own copy of the last recorded state so that snapshot() always matches
+    the journal position exactly, even while request threads are
+    mid-mutation.
+
+    The file is only created by the first record(), and the first entry
+    also carries the world's seed, which no command changes: a world that
+    is never mutated leaves nothing on disk, and one persisted only
+    through its journal still replays with its own random streams.
+    """
+
+    def __init__(self, path, state, seq=0, offset=0):
+        self.path = path
+        self.seq = seq
+        self._view = state.copy()
+        self._lock = threading.Lock()
+        self._file = None
+        self.offset = offset
+
+    @JOURNAL_SECONDS.time()
+    def record(self, state, events=(), reset=False, command=None):
+        with self._lock:
+            changes = state.changes(self._view)
+            if self.seq == 0:
+                changes["seed"] = state["seed"]
+            self.seq += 1
+            entry = {"seq": self.seq, "set": changes}
+            if reset:
+                entry["reset"] = list(state["recent_events"])
+            if events:
+                entry["events"] = list(events)
+            if command is not None:
+                entry["cmd"] = command
+            line = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+            if self._file is None:
+                # Drop a torn line left by an interrupted append first.
+                self._file = open(self.path, "ab")
+                self._file.truncate(self.offset)
+            self._file.write(line)
+            self._file.flush()
+            self.offset += len(line)
+            apply_entry(self._view, entry)
+            return entry
+
+    def catch_up(self, state):
+        """Apply entries other processes appended since our last write; returns them."""
+        with self._lock:
+            entries = []
+            seq, offset = replay_journal(self.path, state, self.offset, entries.append)
+            if seq is None:
+                return entries
+            self.seq = seq
+            self.offset = offset
+            self._view = state.copy()
+            return entries
+
+    def snapshot(self):
+        with self._lock:
+            return self._view.to_json(journal={"seq": self.seq, "offset": self.offset})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+
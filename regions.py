@@ -0,0 +1,209 @@
+import threading
+
+import numpy as np
+
+# Calibration: an average hub pays what the flat formula used to, $10 per
+# employee and 5% on invested capital per day.
+BASE_WAGE = 10.0
+BASE_RETURN = 0.05
+
+LABOR_SHARE = 0.6               # Cobb-Douglas exponent of labor in sector output
+SPECIALIZATION_WEIGHT = 4.0     # a listed specialization's share of a hub's economy vs. any other sector
+SPECIALIZED_PRODUCTIVITY = 1.5  # productivity of a listed specialization vs. any other sector
+PARTICIPATION = 0.5             # share of a hub's population in the labor force
+CAPITAL_PER_WORKER = 100_000.0
+LABOR_MOBILITY = 0.002          # daily labor response to a relative wage gap
+CAPITAL_MOBILITY = 0.01         # daily capital response to a relative return gap, before defensibility
+
+# Days of regional history simulated per extension, and the day after
+# which the economy is held at its (by then settled) state.
+BLOCK_DAYS = 365
+HORIZON_DAYS = 36_500
+
+
+class RegionalEconomy:
+    """Sector output, labor and capital of every location as (locations, sectors) matrices.
+
+    Sectors are the union of the catalog's specializations. Each hub's labor
+    force and capital start split across sectors by specialization, output
+    is Cobb-Douglas per cell, and every day labor and capital flow between
+    hubs toward higher wages and returns (capital less so where a hub is
+    more defensible); flows conserve each sector's totals. The dynamics are
+    deterministic, so the path is simulated once, in blocks of BLOCK_DAYS,
+    and shared by every world: a world's income for any day range is a
+    lookup into the per-day `wage` and `capital_return` rows, scaled so the
+    labor-weighted average hub pays BASE_WAGE and BASE_RETURN on day 1.
+
+    Each world adjusts the shared path with its own holdings: its personnel
+    join the labor of the hub it is in and its investments the capital of
+    the hubs they were placed in (see adjusted_rates()), so a world's wages
+    and returns fall as it crowds a hub, without touching the path other
+    worlds read. Column `len(names)` of every path stands for a location
+    outside the catalog and always pays the base rates.
+    """
+
+    def __init__(self, locations):
+        self.names = list(locations)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.sectors = sorted({s for loc in locations.values() for s in loc["specialization"]})
+        sector_index = {s: k for k, s in enumerate(self.sectors)}
+        specialized = np.zeros((len(self.names), len(self.sectors)), dtype=bool)
+        for i, loc in enumerate(locations.values()):
+            specialized[i, [sector_index[s] for s in loc["specialization"]]] = True
+
+        self.weights = np.where(specialized, SPECIALIZATION_WEIGHT, 1.0)
+        self.weights /= self.weights.sum(axis=1, keepdims=True)
+        self.productivity = np.where(specialized, SPECIALIZED_PRODUCTIVITY, 1.0)
+        defensibility = np.array([loc["defensibility"] for loc in locations.values()], dtype=np.float64)
+        self.capital_mobility = (CAPITAL_MOBILITY * (1.0 - defensibility / 100.0))[:, np.newaxis]
+        population = np.array([loc["population"] for loc in locations.values()], dtype=np.float64)
+        self.labor = population[:, np.newaxis] * PARTICIPATION * self.weights
+        self.capital = self.labor * CAPITAL_PER_WORKER
+
+        wage, capital_return, _ = self._prices()
+        hub_labor = self.labor.sum(axis=1)
+        hub_capital = self.capital.sum(axis=1)
+        self.wage_scale = BASE_WAGE * hub_labor.sum() / (self._hub_mean(wage, self.labor) * hub_labor).sum()
+        self.return_scale = BASE_RETURN * hub_capital.sum() / (self._hub_mean(capital_return, self.capital) * hub_capital).sum()
+
+        self.days = 0  # days simulated so far; path row d - 1 holds day d
+        width = len(self.names) + 1
+        self.wage = np.empty((0, width))
+        self.capital_return = np.empty((0, width))
+        self.output = np.empty((0, len(self.names)))
+        self.hub_labor = np.empty((0, len(self.names)))
+        self.hub_capital = np.empty((0, len(self.names)))
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def location_ids(self, locations):
+        unknown = len(self.names)
+        return np.array([self.index.get(loc, unknown) for loc in locations], dtype=np.int64)
+
+    def capital_matrix(self, holdings):
+        """(worlds, locations + 1) capital from each world's {location: amount} holdings."""
+        matrix = np.zeros((len(holdings), len(self.names) + 1))
+        unknown = len(self.names)
+        for i, placed in enumerate(holdings):
+            for loc, amount in placed.items():
+                matrix[i, self.index.get(loc, unknown)] += amount
+        return matrix
+
+    def rows(self, days):
+        """Path row indexes for an array of day numbers (1-based), simulating ahead as needed."""
+        days = np.minimum(np.asarray(days, dtype=np.int64), HORIZON_DAYS)
+        last = int(days.max(initial=1))
+        if last > self.days:
+            self._extend(last)
+        return days - 1
+
+    def rates(self, location, day, personnel=0, capital=None):
+        """(wage per employee, return on capital) paid at `location` on `day`.
+
+        `personnel` working there and `capital` ({location: amount}) are the
+        asking world's own holdings, as in adjusted_rates().
+        """
+        rows = self.rows([[max(day, 1)]])
+        region_ids = self.location_ids([location])
+        wage, capital_return = self.adjusted_rates(rows, region_ids, np.array([[personnel]]),
+                                                   self.capital_matrix([capital or {}]))
+        return float(wage[0, 0]), float(capital_return[0, 0, region_ids[0]])
+
+    def adjusted_rates(self, rows, region_ids, personnel, capital):
+        """Wages and returns each world is paid once its own holdings join the hubs' matrices.
+
+        `rows` is a (days, worlds) array of path rows, `region_ids` each
+        world's location, `personnel` its (days, worlds) workforce and
+        `capital` its (worlds, locations + 1) holdings. A world's workers
+        and capital are split across a hub's sectors like the hub's own, so
+        every sector's labor and capital grow by the same factors and the
+        Cobb-Douglas wage and return scale by closed-form powers of them.
+        Returns the (days, worlds) wage at each world's location and the
+        (days, worlds, locations + 1) return of every location.
+        """
+        hubs = len(self.names)
+        labor_factor = np.ones(rows.shape + (hubs + 1,))
+        capital_factor = np.ones(rows.shape + (hubs + 1,))
+        capital_factor[..., :-1] += capital[:, :-1] / self.hub_capital[rows]
+        worlds = np.flatnonzero(region_ids < hubs)
+        hub = region_ids[worlds]
+        labor_factor[:, worlds, hub] += np.maximum(personnel[:, worlds], 0) / self.hub_labor[rows[:, worlds], hub]
+
+        own = (slice(None), np.arange(len(region_ids)), region_ids)
+        own_labor, own_capital = labor_factor[own], capital_factor[own]
+        wage = self.wage[rows, region_ids] * own_labor ** (LABOR_SHARE - 1.0) * own_capital ** (1.0 - LABOR_SHARE)
+        capital_return = self.capital_return[rows] * labor_factor ** LABOR_SHARE * capital_factor ** -LABOR_SHARE
+        return wage, capital_return
+
+    def aggregates(self, day=1):
+        """Per-location totals for one day: output, labor, capital, wage and return."""
+        row = int(self.rows([max(day, 1)])[0])
+        return {
+            name: {
+                "output": round(float(self.output[row, i]), 2),
+                "labor": round(float(self.hub_labor[row, i])),
+                "capital": round(float(self.hub_capital[row, i]), 2),
+                "wage": round(float(self.wage[row, i]), 4),
+                "capital_return": round(float(self.capital_return[row, i]), 6),
+            }
+            for i, name in enumerate(self.names)
+        }
+
+    def _prices(self):
+        output = self.productivity * self.labor ** LABOR_SHARE * self.capital ** (1.0 - LABOR_SHARE)
+        wage = LABOR_SHARE * output / self.labor
+        capital_return = (1.0 - LABOR_SHARE) * output / self.capital
+        return wage, capital_return, output
+
+    @staticmethod
+    def _hub_mean(prices, amounts):
+        return (prices * amounts).sum(axis=1) / amounts.sum(axis=1)
+
+    @staticmethod
+    def _flow(amounts, prices, mobility):
+        # Move amounts toward cells priced above the sector's amount-weighted
+        # mean. With a per-hub mobility the raw flows no longer sum to zero,
+        # so each sector is rescaled back to its total.
+        totals = amounts.sum(axis=0)
+        mean = (prices * amounts).sum(axis=0) / totals
+        moved = amounts + mobility * amounts * (prices - mean) / mean
+        return moved * (totals / moved.sum(axis=0))
+
+    def _extend(self, until):
+        with self._lock:
+            if until <= self.days:
+                return
+            count = max(until - self.days, BLOCK_DAYS)
+            count = min(count, HORIZON_DAYS - self.days)
+            width = len(self.names) + 1
+            wage = np.empty((count, width))
+            capital_return = np.empty((count, width))
+            output = np.empty((count, len(self.names)))
+            hub_labor = np.empty((count, len(self.names)))
+            hub_capital = np.empty((count, len(self.names)))
+            wage[:, -1] = BASE_WAGE
+            capital_return[:, -1] = BASE_RETURN
+            for d in range(count):
+                day_wage, day_return, day_output = self._prices()
+                wage[d, :-1] = self.wage_scale * self._hub_mean(day_wage, self.labor)
+                capital_return[d, :-1] = self.return_scale * self._hub_mean(day_return, self.capital)
+                output[d] = day_output.sum(axis=1)
+                hub_labor[d] = self.labor.sum(axis=1)
+                hub_capital[d] = self.capital.sum(axis=1)
+                self.labor = self._flow(self.labor, day_wage, LABOR_MOBILITY)
+                self.capital = self._flow(self.capital, day_return, self.capital_mobility)
+            # Readers hold references to the old arrays, so replace, never resize.
+            self.wage = np.concatenate([self.wage, wage])
+            self.capital_return = np.concatenate([self.capital_return, capital_return])
+            self.output = np.concatenate([self.output, output])
+            self.hub_labor = np.concatenate([self.hub_labor, hub_labor])
+            self.hub_capital = np.concatenate([self.hub_capital, hub_capital])
+            self.days += count
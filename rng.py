@@ -0,0 +1,96 @@
+import hashlib
+import math
+import secrets
+
+import numpy as np
+
+# Every world gets one independent stream per subsystem, so draws made by
+# one (say, a market tick) never shift another's (the day's events).
+SUBSYSTEMS = ("economy", "events", "markets", "flavor")
+
+
+def new_seed():
+    """A fresh 63-bit seed for a world that was not given one."""
+    return secrets.randbits(63)
+
+
+def session_key(session_id):
+    """Stable 64-bit key for a session id, used as the first spawn key of its streams."""
+    return int.from_bytes(hashlib.blake2b(session_id.encode(), digest_size=8).digest(), "little")
+
+
+class Stream:
+    """One subsystem's PCG64 generator that only ever draws doubles.
+
+    Each double consumes exactly one generator output, so the number of
+    doubles drawn is the stream's position: a stream rebuilt with the same
+    seed sequence and `draws` continues exactly where the old one stopped.
+    Scalar draws are served from a pre-drawn block of BUFFER doubles; block
+    draws use up that buffer first, so the sequence is the same however
+    the draws are split.
+    """
+
+    BUFFER = 64
+
+    __slots__ = ("generator", "draws", "_buffer", "_next")
+
+    def __init__(self, seed_sequence, draws=0):
+        bit_generator = np.random.PCG64(seed_sequence)
+        bit_generator.advance(draws)
+        self.generator = np.random.Generator(bit_generator)
+        self.draws = draws
+        self._buffer = np.empty(0)
+        self._next = 0
+
+    def random(self, size=None):
+        """Uniform doubles in [0, 1): a float, or an array of `size` (an int or shape)."""
+        if size is None:
+            if self._next == len(self._buffer):
+                self._buffer = self.generator.random(self.BUFFER)
+                self._next = 0
+            value = float(self._buffer[self._next])
+            self._next += 1
+            self.draws += 1
+            return value
+        shape = (size,) if isinstance(size, int) else tuple(size)
+        count = math.prod(shape)
+        buffered = self._buffer[self._next:self._next + count]
+        self._next += len(buffered)
+        if len(buffered) < count:
+            buffered = np.concatenate([buffered, self.generator.random(count - len(buffered))])
+        self.draws += count
+        return buffered.reshape(shape)
+
+    def randint(self, low, high):
+        """Integer in [low, high], both inclusive."""
+        return low + int(self.random() * (high - low + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+
+class RandomStreams:
+    """A world's streams, derived from SeedSequence(seed, spawn_key=key + (subsystem,)).
+
+    `positions` maps subsystem names to the draws already taken, as saved
+    by positions(); streams are created on first use.
+    """
+
+    def __init__(self, seed, key=(), positions=None):
+        self.seed = seed
+        self.key = tuple(key)
+        self._positions = dict(positions or {})
+        self._streams = {}
+
+    def __getitem__(self, subsystem):
+        stream = self._streams.get(subsystem)
+        if stream is None:
+            seed_sequence = np.random.SeedSequence(self.seed, spawn_key=self.key + (SUBSYSTEMS.index(subsystem),))
+            stream = self._streams[subsystem] = Stream(seed_sequence, self._positions.get(subsystem, 0))
+        return stream
+
+    def positions(self):
+        return {
+            name: self._streams[name].draws if name in self._streams else self._positions.get(name, 0)
+            for name in SUBSYSTEMS
+        }
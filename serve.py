@@ -0,0 +1,48 @@
+"""Production launcher for the simulation API.
+
+    python serve.py --workers 4 --port 8080
+
+Runs asgi.application under uvicorn with N worker processes. With more
+than one worker, SESSION_SHARED=1 is exported so every worker serves the
+same SESSION_DIR consistently: a request takes the session's flock and
+replays journal entries other workers appended before touching state.
+`--server flask` runs the old single-process Flask development server for
+comparison.
+
+Throughput comparison: 100 players, 3000 requests split evenly between
+GET /api/state and POST /api/advance-day, 8 concurrent urllib clients
+opening one connection per request, best of three runs. Measured in a
+1-core container that also ran the client, so the extra worker cannot
+show real scaling here; expect it to grow with cores.
+
+    server                          req/s
+    flask dev server (threaded)       650
+    asgi, 1 worker                    915
+    asgi, 2 workers (shared)         1000
+"""
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Open World Life Simulator API.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--server", choices=["asgi", "flask"], default="asgi")
+    args = parser.parse_args()
+
+    if args.server == "flask":
+        from app import app
+        app.run(host=args.host, port=args.port, threaded=True)
+        return
+
+    if args.workers > 1:
+        os.environ["SESSION_SHARED"] = "1"
+    import uvicorn
+    uvicorn.run("asgi:application", host=args.host, port=args.port, workers=args.workers,
+                lifespan="on", log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import fcntl
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from persistence import Journal, load_journaled_state
+from rng import session_key
+from world import PRIVATE_FIELDS
+
+SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Journal entries kept in memory per session so streaming clients can
+# resync from a recent version without a full state transfer.
+DELTA_BACKLOG = 256
+
+# Files that make up one session on disk, by suffix after the session id.
+SESSION_FILES = (".json", ".journal.jsonl", ".lock")
+
+log = logging.getLogger(__name__)
+
+
+def entry_delta(entry):
+    """Wire form of a journal entry: the changed fields and new events, tagged with a version.
+
+    The seed and stream positions stay server-side (see world.PRIVATE_FIELDS).
+    """
+    changes = {name: value for name, value in entry["set"].items() if name not in PRIVATE_FIELDS}
+    delta = {"version": entry["seq"], "set": changes}
+    if "reset" in entry:
+        delta["reset"] = entry["reset"]
+    if "events" in entry:
+        delta["events"] = entry["events"]
+    return delta
+
+
+def unlink_session(base):
+    for suffix in SESSION_FILES:
+        try:
+            os.unlink(base + suffix)
+        except FileNotFoundError:
+            pass
+
+
+class Session:
+    """One player's world: its state, its journal and the lock that serializes mutations.
+
+    Sessions are the server's engine games: record() journals each
+    command's mutation (tagged with the command), pushes it to stream
+    subscribers and queues a snapshot. Random streams are keyed by the
+    session id, so the same seed gives every session its own streams.
+    """
+
+    def __init__(self, session_id, state, journal, base_path, save):
+        self.id = session_id
+        self.state = state
+        self.journal = journal
+        self.save = save
+        self.snapshot_path = f"{base_path}.json"
+        self.lock_path = f"{base_path}.lock"
+        self.lock = threading.RLock()
+        self.pins = 0
+        self.last_used = time.time()
+        self.key = (session_key(session_id),)
+        self.rngs = None
+        self.markets = None
+        self.command = None
+        self.pending = None
+        self.deltas = deque(maxlen=DELTA_BACKLOG)
+        self.subscribers = []
+
+    @property
+    def version(self):
+        return self.journal.seq
+
+    def record(self, events=(), reset=False):
+        entry = self.journal.record(self.state, events=events, reset=reset, command=self.command)
+        self.command = None
+        self.publish(entry)
+        self.save(self)
+
+    def publish(self, entry):
+        """Record a journal entry's delta and push it to every subscriber."""
+        delta = entry_delta(entry)
+        self.deltas.append(delta)
+        for push in self.subscribers:
+            push(delta)
+
+    def deltas_since(self, version):
+        """Deltas after `version`, or None when the backlog no longer reaches back that far."""
+        if version == self.version:
+            return []
+        if not self.deltas or self.deltas[0]["version"] > version + 1:
+            return None
+        return [d for d in self.deltas if d["version"] > version]
+
+
+class SessionStore:
+    """Session-keyed state store with an in-memory LRU of hot sessions.
+
+    Each session persists to its own snapshot + journal pair under
+    `directory`. When more than `capacity` sessions are resident, the least
+    recently used idle session is snapshotted and dropped from memory; it is
+    rebuilt from disk the next time it is requested.
+
+    The store lock only guards the LRU dict. A session missing from it is
+    loaded outside the lock behind a placeholder Event, which other
+    requests for the same id wait on; requests for other sessions go
+    ahead. Nothing is written for a session until its first mutation, so
+    requests that only read (or carry no session at all) leave no files.
+
+    With a `ttl` (seconds), a background sweep every `sweep_interval`
+    seconds drops sessions idle for longer than that: resident ones from
+    memory, and sessions whose files have not changed for that long from
+    disk.
+
+    With `shared=True` several processes may serve the same directory. A
+    checkout then also takes an exclusive flock on the session's lock file
+    and replays any journal entries other processes appended since this
+    process last touched the session, so the journal is the single source
+    of truth across workers. Open streams call refresh() to do the same
+    while no request is checking the session out here.
+    """
+
+    def __init__(self, directory, factory, writer, capacity=1024, shared=False, ttl=None, sweep_interval=3600):
+        self.directory = directory
+        self.factory = factory
+        self.writer = writer
+        self.capacity = capacity
+        self.shared = shared
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        if ttl:
+            threading.Thread(target=self._sweep, name="session-sweeper", daemon=True).start()
+
+    @contextmanager
+    def session(self, session_id):
+        """Check out a session and hold its lock for the duration of the block."""
+        session = self._pin(session_id)
+        try:
+            with session.lock:
+                if not self.shared:
+                    yield session
+                    return
+                with open(session.lock_path, "a") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    entries = session.journal.catch_up(session.state)
+                    if entries:
+                        session.rngs = None
+                        session.markets = None
+                        for entry in entries:
+                            session.publish(entry)
+                    yield session
+        finally:
+            with self._lock:
+                session.pins -= 1
+
+    @contextmanager
+    def subscribe(self, session_id, push, on_subscribe):
+        """Keep a session resident and call push(delta) for each change until the block exits.
+
+        on_subscribe(session) runs under the session lock right after push is
+        registered; its return value is yielded, so a client can be sent its
+        starting point without missing or repeating a change.
+        """
+        session = self._pin(session_id)
+        try:
+            with session.lock:
+                session.subscribers.append(push)
+                initial = on_subscribe(session)
+            try:
+                yield initial
+            finally:
+                with session.lock:
+                    session.subscribers.remove(push)
+        finally:
+            with self._lock:
+                session.pins -= 1
+
+    def refresh(self, session_id):
+        """In shared mode, pick up entries other workers journaled; subscribers get them pushed."""
+        if self.shared:
+            with self.session(session_id):
+                pass
+
+    def save(self, session):
+        """Queue a snapshot of the session for the background writer."""
+        self.writer.mark_dirty(session.snapshot_path, session.journal.snapshot)
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            while self._sessions:
+                _, session = self._sessions.popitem(last=False)
+                if isinstance(session, Session):
+                    self._unload(session)
+        self.writer.flush()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def expire(self, now=None):
+        """Drop sessions idle for longer than the ttl, from memory and from disk."""
+        cutoff = (time.time() if now is None else now) - self.ttl
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                if isinstance(session, Session) and not session.pins and session.last_used < cutoff:
+                    del self._sessions[session_id]
+                    self._unload(session)
+        stamps = {}
+        for name in os.listdir(self.directory):
+            session_id, dot, _ = name.partition(".")
+            if dot and SESSION_ID_RE.match(session_id):
+                try:
+                    stamp = os.stat(os.path.join(self.directory, name)).st_mtime
+                except FileNotFoundError:
+                    continue
+                stamps[session_id] = max(stamps.get(session_id, stamp), stamp)
+        for session_id, stamp in stamps.items():
+            if stamp < cutoff:
+                self._remove(session_id)
+
+    def _sweep(self):
+        while not self._closed.wait(self.sweep_interval):
+            try:
+                self.expire()
+            except Exception:
+                log.exception("session sweep failed")
+
+    def _remove(self, session_id):
+        # Hold a loading placeholder while the files go, so a request for
+        # the session waits and then starts it afresh.
+        with self._lock:
+            if session_id in self._sessions:
+                return
+            removing = self._sessions[session_id] = threading.Event()
+        try:
+            base = os.path.join(self.directory, session_id)
+            if not self.shared:
+                unlink_session(base)
+            else:
+                with open(f"{base}.lock", "a") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    unlink_session(base)
+        finally:
+            with self._lock:
+                del self._sessions[session_id]
+            removing.set()
+
+    def _pin(self, session_id):
+        if not SESSION_ID_RE.match(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        while True:
+            with self._lock:
+                entry = self._sessions.get(session_id)
+                if isinstance(entry, Session):
+                    self._sessions.move_to_end(session_id)
+                    entry.pins += 1
+                    entry.last_used = time.time()
+                    return entry
+                if entry is None:
+                    loading = self._sessions[session_id] = threading.Event()
+                    break
+            # Another request is loading this session; look again once it is done.
+            entry.wait()
+        try:
+            session = self._load(session_id)
+        except BaseException:
+            with self._lock:
+                del self._sessions[session_id]
+            loading.set()
+            raise
+        with self._lock:
+            self._sessions[session_id] = session
+            session.pins += 1
+            self._evict()
+        loading.set()
+        return session
+
+    def _load(self, session_id):
+        base = os.path.join(self.directory, session_id)
+        if not self.shared:
+            return self._read(session_id, base)
+        # Hold the session's flock so no other worker is mid-append while
+        # the journal tail is replayed (and a torn line truncated).
+        with open(f"{base}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            return self._read(session_id, base)
+
+    def _read(self, session_id, base):
+        journal_path = f"{base}.journal.jsonl"
+        state, seq, offset = load_journaled_state(f"{base}.json", journal_path, self.factory())
+        return Session(session_id, state, Journal(journal_path, state, seq, offset), base, self.save)
+
+    def _evict(self):
+        # Skip sessions that a request has checked out; they become eligible
+        # again once they are idle.
+        excess = len(self._sessions) - self.capacity
+        if excess <= 0:
+            return
+        for session_id in list(self._sessions):
+            if excess <= 0:
+                break
+            session = self._sessions[session_id]
+            if not isinstance(session, Session) or session.pins:
+                continue
+            del self._sessions[session_id]
+            self._unload(session)
+            excess -= 1
+
+    def _unload(self, session):
+        # Every mutation already queued a snapshot with the writer (see
+        # save()), and the journal's view outlives its file, so the writer
+        # still takes the final one after the close.
+        session.journal.close()
@@ -0,0 +1,141 @@
+"""Run seeded games headlessly and write one summary per run.
+
+    python simulate.py --runs 10000 --days 365 --seed 7 > runs.jsonl
+    python simulate.py --runs 10000 --days 365 --format columns -o runs.json
+    python simulate.py --runs 1000 --days 90 --location London --command "invest 500000"
+    python simulate.py --replay sessions/<id>
+
+Each run starts a fresh engine.Game, plays the given chat commands, then
+advances to the day horizon in one batch step. Run i uses the seed with
+spawn key (i,), so its result depends only on the seed, its index and the
+options, not on how runs are split across the worker processes.
+
+`--replay` replays a server session's command log (the commands tagged in
+its journal) from the session's seed, prints the resulting state and
+exits non-zero if it differs from the journaled state.
+
+`--format jsonl` streams one JSON object per run as chunks finish, in run
+order; `--format columns` writes a single object holding one array per
+summary field, the layout columnar tools expect.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+from persistence import load_journaled_state, replay_journal
+from rng import session_key
+
+SUMMARY_FIELDS = (
+    "run", "day", "location", "money", "population", "energy", "happiness", "security",
+    "cash_invested", "income", "events",
+)
+
+
+def play_run(run, seed, days, location=None, commands=()):
+    """Play one seeded game to the day horizon and summarize it."""
+    game = engine.Game(seed=seed, key=(run,))
+    if location is not None:
+        game.state["location"] = location
+    for command in commands:
+        engine.play(game, "chat", command)
+    income, events = engine.play(game, "advance", days)
+    state = game.state
+    return {
+        "run": run,
+        "day": state["day"],
+        "location": state["location"],
+        "money": state["money"],
+        "population": state["population"],
+        "energy": state["energy"],
+        "happiness": state["happiness"],
+        "security": state["security"],
+        "cash_invested": state["cash_invested"],
+        "income": income,
+        "events": events,
+    }
+
+
+def play_chunk(start, count, seed, days, location, commands):
+    return [play_run(run, seed, days, location, commands) for run in range(start, start + count)]
+
+
+def summaries(args):
+    """Yield run summaries in run order, computed in chunks across the worker pool."""
+    starts = range(0, args.runs, args.chunk)
+    counts = [min(args.chunk, args.runs - start) for start in starts]
+    n = len(counts)
+    chunk_args = (starts, counts, [args.seed] * n, [args.days] * n, [args.location] * n, [args.command] * n)
+    if args.workers == 1:
+        chunks = map(play_chunk, *chunk_args)
+        yield from (summary for chunk in chunks for summary in chunk)
+        return
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for chunk in pool.map(play_chunk, *chunk_args):
+            yield from chunk
+
+
+def write_jsonl(results, out):
+    for summary in results:
+        out.write(json.dumps(summary, separators=(",", ":")) + "\n")
+
+
+def write_columns(results, out):
+    columns = {field: [] for field in SUMMARY_FIELDS}
+    for summary in results:
+        for field in SUMMARY_FIELDS:
+            columns[field].append(summary[field])
+    json.dump({"runs": len(columns["run"]), "columns": columns}, out, separators=(",", ":"))
+    out.write("\n")
+
+
+def replay_session(base):
+    """Replay a session's command log; returns (replayed game, whether it matches the journal)."""
+    snapshot_path, journal_path = f"{base}.json", f"{base}.journal.jsonl"
+    commands = []
+
+    def collect(entry):
+        if "cmd" in entry:
+            commands.append(entry["cmd"])
+
+    replay_journal(journal_path, engine.new_state(), on_entry=collect)
+    expected, _, _ = load_journaled_state(snapshot_path, journal_path, engine.new_state())
+    game = engine.replay(commands, expected["seed"], (session_key(os.path.basename(base)),))
+    return game, game.state.to_dict() == expected.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run bulk Monte Carlo games of the Open World Life Simulator.")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--location", choices=list(engine.LOCATIONS))
+    parser.add_argument("--command", action="append", default=[],
+                        help="chat command to play before advancing; repeatable")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=100, help="runs per worker task")
+    parser.add_argument("--format", choices=["jsonl", "columns"], default="jsonl")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--replay", metavar="SESSION", help="replay a session, given as SESSION_DIR/<id>")
+    args = parser.parse_args()
+    if args.replay:
+        game, matches = replay_session(args.replay)
+        print(game.state.to_json())
+        if not matches:
+            sys.exit("replayed state differs from the journal")
+        return
+    if args.runs < 1 or args.days < 1 or args.chunk < 1 or args.workers < 1:
+        parser.error("--runs, --days, --chunk and --workers must be positive")
+
+    write = write_jsonl if args.format == "jsonl" else write_columns
+    if args.output is None:
+        write(summaries(args), sys.stdout)
+    else:
+        with open(args.output, "w") as out:
+            write(summaries(args), out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Precompressed, validated responses for static and memoized bodies.
+
+An Asset holds one response body with everything the hot path needs
+already computed: a strong ETag, a gzip variant (and a brotli one when
+the optional `brotli` package is installed) and its Cache-Control value.
+Asset.respond() then only picks a variant from the request's
+Accept-Encoding and answers 304 when If-None-Match already names it;
+nothing is encoded, hashed or compressed per request.
+
+FileAsset rebuilds its Asset when the file's mtime or size changes, and
+AssetCache memoizes Assets by body, so a body that is itself memoized
+upstream (a str kept until its data changes) maps to the same Asset
+until that data changes.
+"""
+import collections
+import gzip
+import hashlib
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth a compressed variant.
+MIN_COMPRESS_SIZE = 1024
+
+
+def accepted_encodings(accept_encoding):
+    """Encodings the client accepts, from an Accept-Encoding header value."""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class Asset:
+    """One response body with its precomputed ETag and compressed variants."""
+
+    def __init__(self, body, content_type, cache_control="no-cache"):
+        if isinstance(body, str):
+            body = body.encode()
+        self.content_type = content_type
+        self.cache_control = cache_control
+        tag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        # One strong ETag per representation, as the bytes differ.
+        self.variants = {None: (body, f'"{tag}"')}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.variants["gzip"] = (compressed, f'"{tag}-gz"')
+            if brotli is not None:
+                compressed = brotli.compress(body)
+                if len(compressed) < len(body):
+                    self.variants["br"] = (compressed, f'"{tag}-br"')
+        self.etags = {etag for _, etag in self.variants.values()}
+
+    def select(self, accept_encoding):
+        """(encoding, body, etag) of the smallest variant the client accepts."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return (encoding,) + self.variants[encoding]
+        return (None,) + self.variants[None]
+
+    def respond(self, accept_encoding=None, if_none_match=None):
+        """(status, body, headers) for a GET with the given request headers."""
+        encoding, body, etag = self.select(accept_encoding)
+        headers = [("ETag", etag), ("Cache-Control", self.cache_control)]
+        if len(self.variants) > 1:
+            headers.append(("Vary", "Accept-Encoding"))
+        if if_none_match and self.matches(if_none_match):
+            return 304, b"", headers
+        if encoding is not None:
+            headers.append(("Content-Encoding", encoding))
+        return 200, body, headers
+
+    def matches(self, if_none_match):
+        if if_none_match.strip() == "*":
+            return True
+        # Any of our representations still validates the client's copy.
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return not tags.isdisjoint(self.etags)
+
+
+class FileAsset:
+    """An Asset for a file on disk, rebuilt whenever the file changes."""
+
+    def __init__(self, path, content_type, cache_control="no-cache"):
+        self.path = path
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self._asset = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        info = os.stat(self.path)
+        stamp = (info.st_mtime_ns, info.st_size)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    with open(self.path, "rb") as f:
+                        self._asset = Asset(f.read(), self.content_type, self.cache_control)
+                    self._stamp = stamp
+        return self._asset
+
+
+class AssetCache:
+    """LRU of Assets keyed by body, for bodies memoized elsewhere."""
+
+    def __init__(self, content_type, cache_control="no-cache", capacity=256):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.capacity = capacity
+        self._assets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, body):
+        with self._lock:
+            asset = self._assets.get(body)
+            if asset is not None:
+                self._assets.move_to_end(body)
+                return asset
+        asset = Asset(body, self.content_type, self.cache_control)
+        with self._lock:
+            self._assets[body] = asset
+            if len(self._assets) > self.capacity:
+                self._assets.popitem(last=False)
+        return asset
@@ -0,0 +1,177 @@
+import numpy as np
+
+from events import EFFECT_FIELDS
+
+MONEY = EFFECT_FIELDS.index("money")
+HAPPINESS = EFFECT_FIELDS.index("happiness")
+SECURITY = EFFECT_FIELDS.index("security")
+ENERGY = EFFECT_FIELDS.index("energy")
+POPULATION = EFFECT_FIELDS.index("population")
+
+ENERGY_DRAIN_MIN = 5
+ENERGY_DRAIN_MAX = 15
+
+
+def daily_income(population, cash_invested):
+    """Whole-dollar income for one day at the flat rates; works on scalars and arrays alike."""
+    return np.trunc(population * 10 + cash_invested * 0.05).astype(np.int64)
+
+
+def regional_income(population, wage, capital, capital_return):
+    """Whole-dollar income for one day at regional rates.
+
+    `wage` is the wage at each world's location; `capital` and
+    `capital_return` hold one column per location (see RegionalEconomy).
+    """
+    return np.trunc(population * wage + (capital * capital_return).sum(axis=-1)).astype(np.int64)
+
+
+def energy_drain(uniforms):
+    """Map uniform draws in [0, 1) to the inclusive ENERGY_DRAIN_MIN..MAX range."""
+    span = ENERGY_DRAIN_MAX - ENERGY_DRAIN_MIN + 1
+    return ENERGY_DRAIN_MIN + np.floor(uniforms * span).astype(np.int64)
+
+
+class WorldBatch:
+    """Per-world fields of many worlds held as arrays and advanced together.
+
+    Each world-day consumes three doubles from the generator (energy drain,
+    event slot, event accept), drawn in (days, worlds, 3) blocks. A double
+    consumes exactly one generator output, so advancing N days at once
+    leaves the generator, and every world, in the same place as N single-day
+    steps. With a separate `event_rng`, the energy drain comes from `rng` in
+    (days, worlds) blocks and the two event draws from `event_rng`.
+
+    With a RegionalEconomy, personnel earn the wage of the world's location
+    and each world's capital, a (worlds, locations + 1) matrix, earns the
+    return of the location it was placed in, both looked up per day and
+    adjusted for the world's own holdings (see adjusted_rates()).
+    Without one, income follows the flat daily_income rates.
+    """
+
+    # Bounds the size of one pre-drawn block to roughly 24 MB.
+    MAX_BLOCK = 1_000_000
+
+    def __init__(self, day, money, population, energy, cash_invested, happiness, security,
+                 location_ids, rng, sampler=None, event_rng=None, economy=None, region_ids=None, capital=None):
+        self.day = np.asarray(day, dtype=np.int64)
+        self.money = np.asarray(money, dtype=np.int64)
+        self.population = np.asarray(population, dtype=np.int64)
+        self.energy = np.asarray(energy, dtype=np.int64)
+        self.cash_invested = np.asarray(cash_invested, dtype=np.int64)
+        self.happiness = np.asarray(happiness, dtype=np.int64)
+        self.security = np.asarray(security, dtype=np.int64)
+        self.location_ids = np.asarray(location_ids, dtype=np.int64)
+        self.rng = rng
+        self.sampler = sampler
+        self.event_rng = event_rng
+        self.economy = economy
+        if economy is not None:
+            self.region_ids = np.asarray(region_ids, dtype=np.int64)
+            self.capital = np.asarray(capital, dtype=np.float64)
+
+    @classmethod
+    def from_states(cls, states, rng, sampler=None, event_rng=None, economy=None):
+        locations = [s["location"] for s in states]
+        region_ids = capital = None
+        if economy is not None:
+            region_ids = economy.location_ids(locations)
+            capital = economy.capital_matrix([s.get("capital") or {} for s in states])
+            # Capital invested before it was tracked by location earns the base return.
+            capital[:, -1] += np.array([s["cash_invested"] for s in states]) - capital.sum(axis=1)
+        return cls(
+            [s["day"] for s in states],
+            [s["money"] for s in states],
+            [s["population"] for s in states],
+            [s["energy"] for s in states],
+            [s["cash_invested"] for s in states],
+            [s["happiness"] for s in states],
+            [s["security"] for s in states],
+            sampler.location_ids(locations) if sampler is not None else np.zeros(len(states)),
+            rng,
+            sampler,
+            event_rng,
+            economy,
+            region_ids,
+            capital,
+        )
+
+    def __len__(self):
+        return len(self.money)
+
+    def advance(self, days):
+        """Advance every world by `days` days.
+
+        Returns (income, fired): each world's total income, and a (days,
+        worlds) array of event ids rolled each day (None without a sampler).
+        """
+        width = 1 if self.economy is None else self.capital.shape[1]
+        chunk = max(1, self.MAX_BLOCK // max(1, len(self) * width))
+        income = np.zeros(len(self), dtype=np.int64)
+        fired = []
+        for start in range(0, days, chunk):
+            step_income, step_fired = self._advance_block(min(chunk, days - start))
+            income += step_income
+            fired.append(step_fired)
+        return income, (np.concatenate(fired) if self.sampler is not None else None)
+
+    def _advance_block(self, days):
+        if self.event_rng is None:
+            draws = self.rng.random((days, len(self), 3))
+            drain_u, event_u = draws[..., 0], draws[..., 1:]
+        else:
+            drain_u = self.rng.random((days, len(self)))
+            event_u = self.event_rng.random((days, len(self), 2))
+        drain = energy_drain(drain_u)
+        if self.sampler is not None:
+            fired = self.sampler.sample(self.location_ids, event_u[..., 0], event_u[..., 1])
+            deltas = self.sampler.effects[fired]
+        else:
+            fired = None
+            deltas = np.zeros((days, len(self), len(EFFECT_FIELDS)), dtype=np.int64)
+
+        # Income is earned before the day's event lands, so each day sees the
+        # population left by the events of the days before it.
+        population_delta = deltas[..., POPULATION]
+        population = self.population + np.cumsum(population_delta, axis=0) - population_delta
+        if self.economy is None:
+            income = daily_income(population, self.cash_invested).sum(axis=0)
+        else:
+            rows = self.economy.rows(self.day + 1 + np.arange(days)[:, np.newaxis])
+            wage, capital_return = self.economy.adjusted_rates(rows, self.region_ids, population, self.capital)
+            income = regional_income(population, wage, self.capital, capital_return).sum(axis=0)
+        totals = deltas.sum(axis=0)
+
+        self.day += days
+        self.money += income + totals[:, MONEY]
+        self.population += totals[:, POPULATION]
+        self.energy += totals[:, ENERGY] - drain.sum(axis=0)
+        self.happiness += totals[:, HAPPINESS]
+        self.security += totals[:, SECURITY]
+        return income, fired
+
+    def apply_to(self, states):
+        for i, s in enumerate(states):
+            s["day"] = int(self.day[i])
+            s["money"] = int(self.money[i])
+            s["population"] = int(self.population[i])
+            s["energy"] = int(self.energy[i])
+            s["cash_invested"] = int(self.cash_invested[i])
+            s["happiness"] = int(self.happiness[i])
+            s["security"] = int(self.security[i])
+
+
+def advance_worlds(states, days, rng=None, seed=None, sampler=None, economy=None):
+    """Advance a list of state dicts in place by `days` days; returns per-world income.
+
+    Pass either a numpy Generator or a seed, an EventSampler to roll
+    random events and a RegionalEconomy for location-dependent income.
+    The result is the same whether the days are stepped in one call or
+    one at a time with the same generator.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    batch = WorldBatch.from_states(states, rng, sampler, economy=economy)
+    income, _ = batch.advance(days)
+    batch.apply_to(states)
+    return [int(x) for x in income]
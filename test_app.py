@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+
+os.environ.setdefault("SESSION_DIR", tempfile.mkdtemp())
+
+import app
+import engine
+from sessions import DELTA_BACKLOG
+
+SEED = 12345
+
+
+def test_each_command_records_once():
+    recorded = []
+
+    class Recording(engine.Game):
+        def record(self, events=(), reset=False):
+            recorded.append((self.command, list(events), reset))
+            super().record(events, reset)
+
+    game = Recording(seed=SEED)
+    for text in ["research", "reset", "launch a startup"]:
+        engine.play(game, "chat", text)
+    assert [command for command, _, _ in recorded] == game.log
+    # The reset entry's event list already holds the lines logged after it.
+    assert recorded[1][1:] == ([], True)
+    assert len(recorded[0][1]) == 1
+
+
+def test_responses_carry_each_commands_delta():
+    client = app.app.test_client()
+    headers = {"X-Session-Id": "deltas"}
+    versions = []
+    for prompt in ("research", "invest 1000", "ai prompt"):
+        body = client.post("/api/ai-chat", json={"prompt": prompt}, headers=headers).get_json()
+        assert [delta["version"] for delta in body["deltas"]] == [body["version"]]
+        versions.append(body["version"])
+    assert versions == [1, 2, 3]
+
+
+def test_resync_falls_back_to_full_state():
+    with app.store.session("resync") as session:
+        for _ in range(DELTA_BACKLOG + 2):
+            engine.play(session, "chat", "ai prompt")
+        assert [delta["version"] for delta in session.deltas_since(session.version - 2)] == \
+            [session.version - 1, session.version]
+        assert session.deltas_since(session.version) == []
+        # The backlog no longer reaches back to version 1.
+        assert session.deltas_since(1) is None
+        assert "state" in app.respond(session, {}, 1) and "deltas" not in app.respond(session, {}, 1)
+        [message] = app.stream_start(session, 1)
+        assert message.startswith(f"id: {session.version}\nevent: state\n")
+        assert json.loads(message.split("data: ", 1)[1])["version"] == session.version
@@ -0,0 +1,26 @@
+import os
+import pickle
+import shutil
+
+import catalog
+
+
+class Stale:
+    def __reduce__(self):
+        # Unpickles by calling int("stale"), which raises ValueError.
+        return int, ("stale",)
+
+
+def test_stale_pickle_is_recompiled(tmp_path):
+    directory = str(tmp_path / "content")
+    shutil.copytree(catalog.CONTENT_DIR, directory, ignore=shutil.ignore_patterns("__pycache__"))
+    cache_path = os.path.join(directory, "__pycache__", f"catalog-{catalog.content_hash(directory)}.pickle")
+    os.makedirs(os.path.dirname(cache_path))
+    with open(cache_path, "wb") as f:
+        pickle.dump(Stale(), f)
+
+    loaded = catalog._load(directory)
+    assert isinstance(loaded, catalog.Catalog) and loaded.locations
+    # The rebuilt catalog replaced the stale pickle.
+    with open(cache_path, "rb") as f:
+        assert isinstance(pickle.load(f), catalog.Catalog)
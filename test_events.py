@@ -0,0 +1,39 @@
+import numpy as np
+
+import engine
+from events import build_alias
+
+SEED = 12345
+
+
+def test_alias_table_frequencies():
+    weights = [0.5, 0.25, 0.125, 0.1, 0.025]
+    prob, alias = build_alias(weights)
+    rng = np.random.default_rng(SEED)
+    draws = 400_000
+    slot = rng.integers(0, len(weights), draws)
+    outcome = np.where(rng.random(draws) < prob[slot], slot, alias[slot])
+    frequencies = np.bincount(outcome, minlength=len(weights)) / draws
+    assert np.allclose(frequencies, weights, atol=0.005)
+
+
+def test_event_sampler_frequencies():
+    sampler = engine.content().event_sampler
+    location = next(iter(sampler.location_index))
+    rng = np.random.default_rng(SEED)
+    draws = 400_000
+    fired = sampler.sample(sampler.location_ids([location]), rng.random(draws), rng.random(draws))
+    frequencies = np.bincount(fired, minlength=sampler.none + 1) / draws
+    for event_id, event in enumerate(sampler.events):
+        expected = event["chance"] if event["location"] == location else 0.0
+        assert abs(frequencies[event_id] - expected) < 0.005
+
+
+def test_advance_logs_the_events_it_rolls():
+    sampler = engine.content().event_sampler
+    game = engine.Game(seed=SEED)
+    _, fired = engine.advance(game, 365)
+    described = {sampler.describe(event_id) for event_id in range(sampler.none)}
+    lines = list(game.state["recent_events"])[-min(fired, engine.MAX_RECENT_EVENTS - 1) - 1:-1]
+    assert fired > 0
+    assert all(line.split(": ", 1)[1] in described for line in lines)
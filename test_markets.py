@@ -0,0 +1,38 @@
+import json
+
+import numpy as np
+
+import engine
+from markets import MarketSimulator
+from rng import RandomStreams
+
+SEED = 12345
+
+
+def test_one_long_tick_matches_single_days():
+    catalog = engine.content().markets
+    whole, single = MarketSimulator(catalog), MarketSimulator(catalog)
+    whole.tick(RandomStreams(SEED)["markets"], 40)
+    stream = RandomStreams(SEED)["markets"]
+    for _ in range(40):
+        single.tick(stream)
+    assert np.array_equal(whole.level, single.level)
+    assert np.array_equal(whole.history(), single.history())
+
+
+def test_history_is_rebuilt_after_reload():
+    game = engine.Game(seed=SEED)
+    engine.play(game, "advance", 10)
+    engine.play(game, "chat", "research")
+    engine.play(game, "advance", 30)
+    live = engine.game_markets(game).history()
+    assert live.shape == (30, len(engine.content().markets))
+
+    game.markets = None
+    rebuilt = engine.game_markets(game)
+    assert np.allclose(rebuilt.history(), live, rtol=1e-12)
+    body = json.loads(rebuilt.report_json())
+    assert body["history"]["S&P 500"][-1] == body["markets"]["S&P 500"]["index"]
+
+    engine.play(game, "chat", "reset")
+    assert len(engine.game_markets(game).history()) == 0
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+import engine
+from persistence import Journal, StateWriter, load_journaled_state
+
+SEED = 12345
+
+
+def write_journal(journal_path, days):
+    state = engine.new_state(seed=SEED)
+    journal = Journal(journal_path, state)
+    for day in range(2, 2 + days):
+        state["day"] = day
+        state["money"] += 1000
+        state["recent_events"].append(f"Day {day}")
+        journal.record(state, events=[f"Day {day}"])
+    journal.close()
+    return state
+
+
+def test_journal_recovery_ignores_torn_line(tmp_path):
+    snapshot_path = str(tmp_path / "session.json")
+    journal_path = str(tmp_path / "session.journal.jsonl")
+    state = write_journal(journal_path, 3)
+    intact = os.path.getsize(journal_path)
+    with open(journal_path, "ab") as f:
+        f.write(b'{"seq":4,"set":{"day":')
+
+    recovered, seq, offset = load_journaled_state(snapshot_path, journal_path, engine.new_state(seed=SEED))
+    assert (seq, offset) == (3, intact)
+    assert recovered.to_dict() == state.to_dict()
+
+    # Reopening truncates the torn line, so the next entry lands on a clean line.
+    journal = Journal(journal_path, recovered, seq, offset)
+    recovered["day"] = 5
+    journal.record(recovered)
+    journal.close()
+    again, seq, _ = load_journaled_state(snapshot_path, journal_path, engine.new_state(seed=SEED))
+    assert seq == 4 and again["day"] == 5
+
+
+def test_journal_corrupt_middle_line_raises(tmp_path):
+    snapshot_path = str(tmp_path / "session.json")
+    journal_path = str(tmp_path / "session.journal.jsonl")
+    write_journal(journal_path, 3)
+    with open(journal_path, "rb") as f:
+        lines = f.readlines()
+    lines[1] = b"{garbage\n"
+    with open(journal_path, "wb") as f:
+        f.writelines(lines)
+    size = os.path.getsize(journal_path)
+
+    with pytest.raises(ValueError):
+        load_journaled_state(snapshot_path, journal_path, engine.new_state(seed=SEED))
+    assert os.path.getsize(journal_path) == size
+
+
+def test_state_writer_retries_failed_writes(tmp_path):
+    writer = StateWriter(interval=60)
+    path = str(tmp_path / "missing" / "session.json")
+    writer.mark_dirty(path, lambda: '{"day":1}')
+    writer.flush()
+    assert writer._thread.is_alive() and not os.path.exists(path)
+
+    os.mkdir(tmp_path / "missing")
+    writer.flush()
+    with open(path) as f:
+        assert f.read() == '{"day":1}'
+    assert [name for name in os.listdir(tmp_path / "missing")] == ["session.json"]
+    writer.close()
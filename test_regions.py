@@ -0,0 +1,36 @@
+import numpy as np
+
+import engine
+from regions import RegionalEconomy
+
+
+def test_regional_flows_conserve_sector_totals():
+    economy = RegionalEconomy(engine.content().locations)
+    labor, capital = economy.labor.sum(axis=0), economy.capital.sum(axis=0)
+    economy.rows([3650])
+    assert np.allclose(economy.labor.sum(axis=0), labor, rtol=1e-9)
+    assert np.allclose(economy.capital.sum(axis=0), capital, rtol=1e-9)
+
+
+def test_a_worlds_holdings_move_its_own_rates():
+    economy = engine.content().regions
+    wage, capital_return = economy.rates("London", 10)
+    crowded_wage, _ = economy.rates("London", 10, personnel=1_000_000)
+    _, crowded_return = economy.rates("London", 10, capital={"London": 1e11})
+    assert crowded_wage < wage and crowded_return < capital_return
+    # Capital placed elsewhere leaves London's return alone, and the shared path is untouched.
+    assert economy.rates("London", 10, capital={"Shanghai": 1e11}) == (wage, capital_return)
+    assert economy.rates("London", 10) == (wage, capital_return)
+    # Outside the catalog the base rates hold whatever the holdings.
+    assert economy.rates("Mars", 10, personnel=10**6, capital={"Mars": 1e11}) == (10.0, 0.05)
+
+
+def test_investing_more_in_one_hub_earns_less_per_dollar():
+    def income_per_dollar(amount):
+        game = engine.Game(seed=1)
+        game.state["money"] = amount
+        engine.play(game, "chat", f"invest {amount}")
+        income, _ = engine.advance(game, 30)
+        return income / amount
+
+    assert income_per_dollar(10**12) < 0.8 * income_per_dollar(10**9)
@@ -0,0 +1,33 @@
+import numpy as np
+
+import engine
+from rng import RandomStreams
+
+SEED = 12345
+
+
+def test_stream_position_is_independent_of_how_draws_are_split():
+    whole = RandomStreams(SEED, (3,))["events"].random(100)
+    stream = RandomStreams(SEED, (3,))["events"]
+    pieces = [stream.random(), stream.random(7)] + [stream.random() for _ in range(12)] + [stream.random(80)]
+    assert np.array_equal(np.hstack(pieces), whole)
+    resumed = RandomStreams(SEED, (3,), {"events": 60})["events"]
+    assert np.array_equal(resumed.random(40), whole[60:])
+
+
+def test_subsystems_do_not_shift_each_other():
+    streams = RandomStreams(SEED)
+    streams["markets"].random(500)
+    assert np.array_equal(streams["events"].random(10), RandomStreams(SEED)["events"].random(10))
+    assert not np.array_equal(RandomStreams(SEED, (1,))["events"].random(10), RandomStreams(SEED, (2,))["events"].random(10))
+
+
+def test_replay_reproduces_game():
+    game = engine.Game(seed=SEED, key=(7,))
+    commands = ["invest 50000", "go to London", "research", "launch a startup", "advance", "ai prompt"]
+    for text in commands:
+        engine.play(game, "chat", text)
+        engine.play(game, "event")
+    engine.play(game, "advance", 30)
+    replayed = engine.replay(game.log, SEED, game.key)
+    assert replayed.state.to_dict() == game.state.to_dict()
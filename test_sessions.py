@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from functools import partial
+
+import engine
+from persistence import StateWriter
+from sessions import SessionStore
+
+SEED = 12345
+
+
+def new_store(directory, **kwargs):
+    return SessionStore(str(directory), partial(engine.new_state, seed=SEED), StateWriter(interval=0.01), **kwargs)
+
+
+def test_lru_evicts_idle_sessions_and_reloads_them(tmp_path):
+    store = new_store(tmp_path, capacity=2)
+    with store.session("a") as session:
+        engine.play(session, "chat", "invest 50000")
+        expected = session.state.to_dict()
+    with store.session("b") as held:
+        with store.session("c"):
+            with store.session("d"):
+                # "b" is checked out, so only idle sessions make room.
+                assert "b" in store._sessions and "a" not in store._sessions
+        assert held is store._sessions["b"]
+    # Sessions pinned past capacity go on the next load.
+    with store.session("e"):
+        pass
+    assert len(store) == 2
+    store.writer.flush()
+    with store.session("a") as session:
+        assert session.state.to_dict() == expected
+    store.close()
+
+
+def test_nothing_is_written_before_the_first_mutation(tmp_path):
+    store = new_store(tmp_path)
+    for session_id in ("a", "b", "c"):
+        with store.session(session_id):
+            pass
+    store.close()
+    assert os.listdir(tmp_path) == []
+
+    store = new_store(tmp_path)
+    with store.session("a") as session:
+        engine.play(session, "chat", "ai prompt")
+        expected = session.state.to_dict()
+    store.close()
+    # The journal alone restores the seed, and so the streams.
+    os.unlink(tmp_path / "a.json")
+    store = new_store(tmp_path)
+    with store.session("a") as session:
+        assert session.state.to_dict() == expected
+    store.close()
+
+
+def test_cold_load_blocks_only_its_own_session(tmp_path):
+    release = threading.Event()
+
+    class SlowStore(SessionStore):
+        def _read(self, session_id, base):
+            if session_id == "cold":
+                release.wait(5)
+            return super()._read(session_id, base)
+
+    store = SlowStore(str(tmp_path), partial(engine.new_state, seed=SEED), StateWriter(interval=0.01))
+    with store.session("hot"):
+        pass
+    loaded = []
+
+    def load():
+        with store.session("cold") as session:
+            loaded.append(session)
+
+    threads = [threading.Thread(target=load) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started = time.monotonic()
+    with store.session("hot"):
+        pass
+    assert time.monotonic() - started < 1
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(loaded) == 4 and all(session is loaded[0] for session in loaded)
+    store.close()
+
+
+def test_expire_drops_idle_sessions_from_memory_and_disk(tmp_path):
+    store = new_store(tmp_path)
+    with store.session("old") as session:
+        engine.play(session, "chat", "research")
+    store.writer.flush()
+    assert os.listdir(tmp_path)
+    store.ttl = 3600
+    store.expire(time.time() + 7200)
+    assert len(store) == 0 and os.listdir(tmp_path) == []
+    store.close()
+
+
+def test_refresh_pushes_other_workers_entries_to_subscribers(tmp_path):
+    here, there = new_store(tmp_path, shared=True), new_store(tmp_path, shared=True)
+    pushed = []
+    with here.subscribe("a", pushed.append, lambda session: session.version):
+        with there.session("a") as session:
+            engine.play(session, "chat", "research")
+        assert pushed == []
+        here.refresh("a")
+        assert [delta["version"] for delta in pushed] == [1]
+        assert pushed[0]["events"][0].endswith("Research completed in technology sector")
+    here.close()
+    there.close()
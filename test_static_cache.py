@@ -0,0 +1,58 @@
+import gzip
+import os
+import tempfile
+
+os.environ.setdefault("SESSION_DIR", tempfile.mkdtemp())
+
+import app
+from static_cache import Asset, FileAsset, accepted_encodings
+
+BODY = b'{"text": "' + b"hello world " * 500 + b'"}'
+
+
+def test_accepted_encodings_honour_q_values():
+    assert accepted_encodings("gzip;q=0.5, br;q=0, identity") == {"gzip", "identity"}
+    assert accepted_encodings(None) == set()
+
+
+def test_asset_picks_a_variant_and_answers_304():
+    asset = Asset(BODY, "application/json")
+    status, body, headers = asset.respond("gzip, deflate")
+    headers = dict(headers)
+    assert status == 200 and gzip.decompress(body) == BODY
+    assert headers["Content-Encoding"] == "gzip" and headers["Vary"] == "Accept-Encoding"
+
+    status, plain, plain_headers = asset.respond(None)
+    plain_headers = dict(plain_headers)
+    assert plain == BODY and "Content-Encoding" not in plain_headers
+    assert plain_headers["ETag"] != headers["ETag"]
+
+    # Any representation's tag, weak or listed with others, validates.
+    for tag in (headers["ETag"], f'"other", W/{plain_headers["ETag"]}', "*"):
+        status, body, _ = asset.respond("gzip", tag)
+        assert (status, body) == (304, b"")
+    assert asset.respond("gzip", '"stale"')[0] == 200
+
+
+def test_small_bodies_get_no_compressed_variant():
+    status, body, headers = Asset(b"{}", "application/json").respond("gzip, br")
+    assert body == b"{}" and "Vary" not in dict(headers)
+
+
+def test_file_asset_rebuilds_when_the_file_changes(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("one")
+    asset = FileAsset(str(path), "text/html")
+    first = asset.get()
+    assert asset.get() is first
+    path.write_text("two!")
+    assert asset.get() is not first and asset.get().respond()[1] == b"two!"
+
+
+def test_page_revalidates_over_http():
+    client = app.app.test_client()
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200 and response.headers["Content-Encoding"] == "gzip"
+    etag = response.headers["ETag"]
+    again = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
@@ -0,0 +1,47 @@
+import numpy as np
+
+import engine
+from stepper import WorldBatch
+
+SEED = 12345
+
+
+def new_batch(worlds=8, economy=None):
+    states = [engine.new_state(seed=SEED) for _ in range(worlds)]
+    locations = list(engine.content().locations)
+    for i, state in enumerate(states):
+        state["location"] = locations[i % len(locations)]
+        state["cash_invested"] = 50_000 * i
+        state["capital"] = {state["location"]: 30_000 * i}
+    rng = np.random.default_rng(SEED)
+    return WorldBatch.from_states(states, rng, engine.content().event_sampler, economy=economy)
+
+
+def batch_fields(batch):
+    return [batch.day, batch.money, batch.population, batch.energy, batch.happiness, batch.security]
+
+
+def test_batch_steps_in_one_call_match_single_days():
+    for economy in (None, engine.content().regions):
+        whole, single = new_batch(economy=economy), new_batch(economy=economy)
+        income, fired = whole.advance(40)
+        steps = [single.advance(1) for _ in range(40)]
+        assert np.array_equal(income, sum(step_income for step_income, _ in steps))
+        assert np.array_equal(fired, np.concatenate([step_fired for _, step_fired in steps]))
+        for a, b in zip(batch_fields(whole), batch_fields(single)):
+            assert np.array_equal(a, b)
+
+
+def test_engine_advance_matches_single_days():
+    whole, single = engine.Game(seed=SEED), engine.Game(seed=SEED)
+    for game in (whole, single):
+        engine.play(game, "chat", "invest 250000")
+    income, fired = engine.advance(whole, 25)
+    steps = [engine.advance(single, 1) for _ in range(25)]
+    assert income == sum(step_income for step_income, _ in steps)
+    assert fired == sum(step_fired for _, step_fired in steps)
+    # The event log differs by design: one summary line instead of 25.
+    expected = single.state.to_dict()
+    actual = whole.state.to_dict()
+    del expected["recent_events"], actual["recent_events"]
+    assert actual == expected
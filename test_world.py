@@ -0,0 +1,53 @@
+import json
+
+import engine
+from sessions import entry_delta
+from world import MAX_RECENT_EVENTS, PRIVATE_FIELDS, read_state
+
+SEED = 12345
+
+
+def test_client_encodings_leave_out_the_streams():
+    game = engine.Game(seed=SEED)
+    engine.play(game, "chat", "ai prompt")
+    state = game.state
+    public = json.loads(state.to_public_json(version=3))
+    assert public == dict(state.to_public_dict(), version=3)
+    assert PRIVATE_FIELDS.isdisjoint(public) and PRIVATE_FIELDS <= set(json.loads(state.to_json()))
+    delta = entry_delta({"seq": 1, "set": {"seed": SEED, "rng": state["rng"], "day": 2}})
+    assert delta == {"version": 1, "set": {"day": 2}}
+
+
+def test_legacy_state_json_round_trips(tmp_path):
+    legacy = {
+        "money": 1234567.0,
+        "population": 5100,
+        "happiness": 61,
+        "location": "London",
+        "day": 42,
+        "energy": 80,
+        "security": 70,
+        "recent_events": [f'Event {i}: "quoted" café' for i in range(30)],
+        "cash_invested": 50000,
+        "dividends_received": 250,
+        "markets": {"S&P 500": 4800.5},
+        "last_saved": "2024-01-01T00:00:00",
+    }
+    path = tmp_path / "state.json"
+    path.write_text(json.dumps(legacy))
+    default = engine.new_state(seed=SEED)
+    state, meta = read_state(str(path), default)
+
+    assert meta == {}
+    assert state["money"] == 1234567 and type(state["money"]) is int
+    assert list(state["recent_events"]) == legacy["recent_events"][-MAX_RECENT_EVENTS:]
+    assert state["markets"] == dict(default["markets"], **legacy["markets"])
+    assert (state["seed"], state["rng"]) == (default["seed"], default["rng"])
+
+    # Written back as a snapshot, it reads back field for field.
+    snapshot = tmp_path / "session.json"
+    snapshot.write_text(state.to_json(journal={"seq": 3, "offset": 120}))
+    assert json.loads(snapshot.read_text()) == dict(state.to_dict(), journal={"seq": 3, "offset": 120})
+    again, meta = read_state(str(snapshot), engine.new_state(seed=1))
+    assert meta == {"seq": 3, "offset": 120}
+    assert again.to_dict() == state.to_dict()
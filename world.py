@@ -0,0 +1,251 @@
+import json
+from json.encoder import encode_basestring_ascii
+
+MAX_RECENT_EVENTS = 20
+
+# Field order of the wire and disk format; it matches the old state dict.
+FIELDS = (
+    "money", "population", "happiness", "location", "day", "energy", "security",
+    "recent_events", "cash_invested", "dividends_received", "markets", "seed", "rng", "capital",
+)
+INT_FIELDS = frozenset(FIELDS) - {"location", "recent_events", "markets", "rng", "capital"}
+# Dict fields, replaced on change rather than mutated in place.
+DICT_FIELDS = ("markets", "rng", "capital")
+# Fields the journal diffs and replays as plain values; event lines are
+# journaled separately.
+VALUE_FIELDS = tuple(name for name in FIELDS if name != "recent_events")
+# Fields kept in snapshots and the journal but never sent to clients: with
+# the seed and stream positions a client could predict its world's rolls.
+PRIVATE_FIELDS = frozenset(("seed", "rng"))
+PUBLIC_FIELDS = tuple(name for name in FIELDS if name not in PRIVATE_FIELDS)
+
+
+class EventRing:
+    """Fixed-capacity ring buffer of event lines; appending past capacity drops the oldest.
+
+    Lines are held JSON-encoded, as they are far more often serialized
+    than read back, so serializing the ring is a single join and iterating
+    it is a single decode.
+    """
+
+    __slots__ = ("_lines", "_head", "_size")
+
+    def __init__(self, lines=(), capacity=MAX_RECENT_EVENTS):
+        self._lines = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self.extend(lines)
+
+    @property
+    def maxlen(self):
+        return len(self._lines)
+
+    def append(self, line):
+        capacity = len(self._lines)
+        self._lines[(self._head + self._size) % capacity] = encode_basestring_ascii(line)
+        if self._size < capacity:
+            self._size += 1
+        else:
+            self._head = (self._head + 1) % capacity
+
+    def extend(self, lines):
+        for line in lines:
+            self.append(line)
+
+    def clear(self):
+        self._lines = [None] * len(self._lines)
+        self._head = 0
+        self._size = 0
+
+    def copy(self):
+        ring = EventRing.__new__(EventRing)
+        ring._lines = self._lines[:]
+        ring._head = self._head
+        ring._size = self._size
+        return ring
+
+    def to_json(self):
+        # The head only moves once the ring is full; until then it is 0.
+        if self._size < len(self._lines):
+            lines = self._lines[:self._size]
+        else:
+            lines = self._lines[self._head:] + self._lines[:self._head]
+        return "[" + ",".join(lines) + "]"
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(json.loads(self.to_json()))
+
+    def __repr__(self):
+        return f"EventRing({list(self)!r}, capacity={self.maxlen})"
+
+
+_encode_value = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def _compile_template(fields=FIELDS):
+    """One %-format string for the whole record, so encoding is a single string op."""
+    parts = []
+    for name in fields:
+        parts.append(f'"{name}":{"%d" if name in INT_FIELDS else "%s"}')
+    return "{" + ",".join(parts)
+
+
+class WorldState:
+    """One world's simulation state as a slotted record.
+
+    Numeric fields are plain int slots, recent events live in an EventRing,
+    and the record serializes through a precompiled template instead of a
+    generic dict walk. The markets and rng dicts are replaced on every
+    change, never mutated in place, so the markets encoding is cached
+    against the dict itself. `seed` and `rng` (draws taken per subsystem)
+    pin down the world's random streams; see rng.py. `capital` maps
+    locations to the part of cash_invested placed there; see regions.py.
+    It keeps the mapping interface of the old state dict
+    (state["money"], get, items, update) so existing handlers and the
+    stepper work unchanged.
+    """
+
+    __slots__ = FIELDS + ("_markets_json",)
+    TEMPLATE = _compile_template()
+    PUBLIC_TEMPLATE = _compile_template(PUBLIC_FIELDS)
+
+    def __init__(self, money, population, happiness, location, day, energy, security,
+                 recent_events=(), cash_invested=0, dividends_received=0, markets=None, seed=0, rng=None,
+                 capital=None):
+        self.money = money
+        self.population = population
+        self.happiness = happiness
+        self.location = location
+        self.day = day
+        self.energy = energy
+        self.security = security
+        self.recent_events = EventRing(recent_events)
+        self.cash_invested = cash_invested
+        self.dividends_received = dividends_received
+        self.markets = dict(markets or {})
+        self.seed = seed
+        self.rng = dict(rng or {})
+        self.capital = dict(capital or {})
+        self._markets_json = (None, None)
+
+    @classmethod
+    def from_dict(cls, data, default):
+        """Build a state from a loaded dict, filling anything it lacks from `default`."""
+        state = default.copy()
+        state.load(data)
+        return state
+
+    def load(self, data):
+        """Overlay fields from a snapshot or a legacy state.json dict.
+
+        Unknown keys are ignored, numbers are coerced to int, event lists
+        keep only the newest lines that fit, and markets, rng positions or
+        capital holdings missing from the file keep their current value.
+        """
+        for name in FIELDS:
+            if name not in data:
+                continue
+            value = data[name]
+            if name in INT_FIELDS:
+                value = int(value)
+            elif name in DICT_FIELDS:
+                value = dict(getattr(self, name), **value)
+            self[name] = value
+
+    def copy(self):
+        state = WorldState.__new__(WorldState)
+        for name in VALUE_FIELDS:
+            setattr(state, name, getattr(self, name))
+        state.recent_events = self.recent_events.copy()
+        state._markets_json = self._markets_json
+        return state
+
+    def changes(self, other):
+        """Value fields whose value differs from `other`'s."""
+        return {name: getattr(self, name) for name in VALUE_FIELDS if getattr(self, name) != getattr(other, name)}
+
+    def to_dict(self, fields=FIELDS):
+        return {name: (list(self.recent_events) if name == "recent_events" else getattr(self, name)) for name in fields}
+
+    def to_public_dict(self):
+        """to_dict() without PRIVATE_FIELDS, for clients."""
+        return self.to_dict(PUBLIC_FIELDS)
+
+    def to_json(self, **extra):
+        """Compact JSON for the record, with `extra` keys appended after the state fields."""
+        return self._encode(self.TEMPLATE, (self.seed, _encode_value(self.rng)), extra)
+
+    def to_public_json(self, **extra):
+        """to_json() without PRIVATE_FIELDS, for clients."""
+        return self._encode(self.PUBLIC_TEMPLATE, (), extra)
+
+    def _encode(self, template, private, extra):
+        markets, markets_json = self._markets_json
+        if markets is not self.markets:
+            markets_json = _encode_value(self.markets)
+            self._markets_json = (self.markets, markets_json)
+        body = template % (
+            self.money, self.population, self.happiness, encode_basestring_ascii(self.location),
+            self.day, self.energy, self.security, self.recent_events.to_json(),
+            self.cash_invested, self.dividends_received, markets_json, *private,
+            _encode_value(self.capital),
+        )
+        for key, value in extra.items():
+            body += f',"{key}":{value:d}' if type(value) is int else f',"{key}":{_encode_value(value)}'
+        return body + "}"
+
+    # Mapping interface of the old state dict.
+
+    def __getitem__(self, name):
+        if name not in FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        if name == "recent_events":
+            self.recent_events.clear()
+            self.recent_events.extend(value)
+        elif name in FIELDS:
+            setattr(self, name, value)
+        else:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        return name in FIELDS
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def get(self, name, default=None):
+        return getattr(self, name) if name in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def items(self):
+        return [(name, self[name]) for name in FIELDS]
+
+    def update(self, other):
+        for name, value in other.items():
+            self[name] = value
+
+    def __repr__(self):
+        return f"WorldState({self.to_dict()!r})"
+
+
+def read_state(path, default):
+    """Load a state file written by any version: a session snapshot or the old single-world state.json.
+
+    Returns (state, journal meta); the meta is empty for files written
+    before the journal existed. A missing file yields a copy of `default`.
+    """
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return default.copy(), {}
+    meta = data.pop("journal", {})
+    return WorldState.from_dict(data, default), meta